@@ -0,0 +1,227 @@
+"""가격표 이미지 일괄 분석 (HTTP 없이 text_extract / text_analyze 파이프라인 직접 실행)
+
+    python analyze_cli.py image/ --output results.jsonl
+    python analyze_cli.py "archive/**/*.jpg" --output results.jsonl --checkpoint results.ckpt
+    python analyze_cli.py manifest.jsonl --output results.jsonl    # 한 줄에 {"path": ..., 기타 필드}
+
+디코딩/전처리는 프로세스 풀, OCR은 batch_annotate_images 묶음 호출.
+결과는 한 줄에 하나씩 JSONL로 바로 출력, 같은 --checkpoint로 다시 실행하면 끝난 이미지는 건너뜀
+(OCR 백엔드/캐시 설정은 서버와 같은 환경 변수 사용)
+"""
+import argparse, glob, json, logging, multiprocessing, os, sys, time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import ocr_cache, ocr_tiers
+from preprocess import PreprocessConfig, Preprocessor
+
+logger = logging.getLogger("analysis.cli")
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".tif", ".tiff")
+
+
+def iter_inputs(sources, path_field="path"):
+    """(이미지 경로, 매니페스트 필드) 순회. 디렉터리 / glob 패턴 / .jsonl 매니페스트"""
+    for source in sources:
+        if source.endswith(".jsonl"):
+            # 상대 경로는 매니페스트 파일 위치 기준
+            base = os.path.dirname(source)
+            with open(source, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    path = record.pop(path_field)
+                    yield os.path.normpath(os.path.join(base, path)), record
+        elif os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.normpath(os.path.join(root, name)), {}
+        else:
+            for path in sorted(glob.glob(source, recursive=True)):
+                if os.path.isfile(path):
+                    yield os.path.normpath(path), {}
+
+
+def load_checkpoint(path):
+    # 완료된 이미지 경로 (한 줄에 하나)
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+_preprocessor = None
+
+
+def init_worker():
+    # 프로세스 풀에서는 첫 OCR 단계 전처리만 (다음 단계는 필요한 이미지만 OCR 스레드에서)
+    global _preprocessor
+    _preprocessor = Preprocessor(PreprocessConfig.from_env().replace(**ocr_tiers.from_env()[0].overrides))
+
+
+def load_and_preprocess(path):
+    # 프로세스 풀에서 실행: 파일 읽기 + 해시 + 전처리
+    with open(path, "rb") as f:
+        data = f.read()
+    return ocr_cache.image_hash(data), _preprocessor.run(data)
+
+
+def run(args):
+    import main as service  # 서버와 같은 OCR 백엔드 / 캐시 / 결과 형식 사용
+    from ocr_backend import annotations_from_json, annotations_to_json
+
+    backend = service.get_backend(args.backend)
+    done = load_checkpoint(args.checkpoint)
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    checkpoint = open(args.checkpoint, "a", encoding="utf-8") if args.checkpoint else None
+    stats = {"analyzed": 0, "errors": 0, "skipped": 0, "cache_hits": 0}
+    stats.update({f"tier_{t.name}": 0 for t in service.ocr_tier_list})
+    start = time.perf_counter()
+
+    def emit(path, meta, payload=None, error=None, retry=False, tier=None):
+        # 결과를 먼저 기록한 뒤 체크포인트 기록 (중단 시 최대 한 묶음만 다시 처리)
+        # retry: OCR 호출 실패처럼 다시 실행하면 성공할 수 있는 오류는 체크포인트에 남기지 않음
+        # tier: 결과를 낸 OCR 단계 (캐시 적중은 "cache")
+        record = {**meta, "path": path, "result": payload, "error": error, "tier": tier}
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        if checkpoint and not retry:
+            checkpoint.write(path + "\n")
+            checkpoint.flush()
+        stats["errors" if error else "analyzed"] += 1
+        if f"tier_{tier}" in stats:
+            stats[f"tier_{tier}"] += 1
+        total = stats["analyzed"] + stats["errors"]
+        if total % args.progress == 0:
+            logger.info("%d장 처리 (%.1f장/초)", total, total / (time.perf_counter() - start))
+
+    def ocr_batch(batch):
+        # OCR 스레드에서 실행: batch_annotate_images 묶음 호출 + text_analyze
+        tiers = service.ocr_tier_list
+        # 첫 단계는 작은 이미지를 캔버스에 모아 OCR (MOSAIC_ENABLED=1)
+        packing = service.mosaic.plan([item[4].size for item in batch], service.mosaic_config)
+        detected = service.run_ocr_packed(backend, [item[4].content for item in batch],
+                                          [service.ocr_key(item[2], tiers[0]) for item in batch],
+                                          packing, tiers[0].document)
+        # 좌표는 업로드 사진 기준으로 (서비스 캐시와 같은 형태)
+        detected = [texts if isinstance(texts, Exception) else service.upload_coords(texts, item[4])
+                    for item, texts in zip(batch, detected)]
+        served = [tiers[0].name] * len(batch)
+
+        # 결과가 부족한 이미지만 다음 단계로 다시 전처리 + 묶음 호출
+        for tier in tiers[1:]:
+            retry = [i for i, texts in enumerate(detected)
+                     if not isinstance(texts, Exception) and not ocr_tiers.acceptable(service.text_analyze(texts))]
+            if not retry:
+                break
+            preps = []
+            for i in retry:
+                with open(batch[i][0], "rb") as f:
+                    preps.append(service.preprocess_image(f.read(), tier.name))
+            keys = [service.ocr_key(batch[i][2], tier) for i in retry]
+            detected_tier = service.run_ocr_batch(backend, [p.content for p in preps], keys, tier.document)
+            for i, prep, texts in zip(retry, preps, detected_tier):
+                if not isinstance(texts, Exception):
+                    detected[i] = service.upload_coords(texts, prep)
+                    served[i] = tier.name
+
+        results = []
+        for (path, meta, _, key, _), texts, tier in zip(batch, detected, served):
+            if isinstance(texts, Exception):
+                results.append((path, meta, None, f"OCR 실패: {texts}", True))
+                continue
+            service.cache.put(key, annotations_to_json(texts))
+            try:
+                results.append((path, meta, service.build_result(texts), None, False, tier))
+            except Exception as e:
+                results.append((path, meta, None, f"분석 실패: {e}", False, tier))
+        return results
+
+    def inputs():
+        for path, meta in iter_inputs(args.inputs, args.path_field):
+            if path in done:
+                stats["skipped"] += 1
+                continue
+            yield path, meta
+
+    source = inputs()
+    exhausted = False
+    preprocessing = {}  # future -> (path, meta)
+    ocr_running = set()
+    batch = []
+    # 자식 프로세스는 spawn으로 생성 (gRPC 채널을 가진 프로세스를 fork하지 않도록)
+    context = multiprocessing.get_context("spawn")
+
+    try:
+        with ProcessPoolExecutor(args.workers, mp_context=context, initializer=init_worker) as pool, \
+                ThreadPoolExecutor(args.ocr_concurrency, thread_name_prefix="ocr") as ocr_pool:
+            while preprocessing or ocr_running or batch or not exhausted:
+                # 메모리 사용을 제한하기 위해 전처리 결과는 일정 개수까지만 쌓아 둠
+                while not exhausted and len(preprocessing) + len(batch) < args.workers * 2 + args.batch_size:
+                    item = next(source, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    preprocessing[pool.submit(load_and_preprocess, item[0])] = item
+
+                if batch and len(ocr_running) < args.ocr_concurrency and (
+                        len(batch) >= args.batch_size or (exhausted and not preprocessing)):
+                    ocr_running.add(ocr_pool.submit(ocr_batch, batch[:args.batch_size]))
+                    batch = batch[args.batch_size:]
+                    continue
+
+                if not preprocessing and not ocr_running:
+                    continue
+
+                finished, _ = wait(list(preprocessing) + list(ocr_running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in ocr_running:
+                        ocr_running.discard(future)
+                        for result in future.result():
+                            emit(*result)
+                        continue
+
+                    path, meta = preprocessing.pop(future)
+                    try:
+                        image_hash, prep = future.result()
+                    except Exception as e:
+                        emit(path, meta, error=f"전처리 실패: {e}")
+                        continue
+                    key = service.extract_key(image_hash, backend)
+                    cached = service.cache.get(key)
+                    if cached is not None:
+                        stats["cache_hits"] += 1
+                        emit(path, meta, service.build_result(annotations_from_json(cached)), tier="cache")
+                    else:
+                        batch.append((path, meta, image_hash, key, prep))
+    finally:
+        if args.output:
+            out.close()
+        if checkpoint:
+            checkpoint.close()
+        backend.close()
+        service.cache.close()
+
+    stats["elapsed_sec"] = time.perf_counter() - start
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="가격표 이미지 일괄 분석")
+    parser.add_argument("inputs", nargs="+", help="이미지 디렉터리, glob 패턴 또는 .jsonl 매니페스트")
+    parser.add_argument("--output", help="결과 JSONL 파일 (이어 쓰기, 기본: 표준 출력)")
+    parser.add_argument("--checkpoint", help="완료 목록 파일 (다시 실행 시 완료된 이미지 건너뜀)")
+    parser.add_argument("--backend", help="OCR 백엔드 (기본: OCR_BACKEND)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="전처리 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=16, help="OCR 한 번에 보낼 이미지 수")
+    parser.add_argument("--ocr-concurrency", type=int, default=4, help="동시에 실행할 OCR 묶음 수")
+    parser.add_argument("--path-field", default="path", help="매니페스트에서 이미지 경로 필드 이름")
+    parser.add_argument("--progress", type=int, default=100, help="진행 상황 로그 간격 (장)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    stats = run(args)
+    logger.info("완료 %s", json.dumps(stats, ensure_ascii=False))
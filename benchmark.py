@@ -0,0 +1,675 @@
+"""분석 서비스 벤치마크
+
+    python benchmark.py service                     # 앱 내부 호출 (fake OCR)
+    python benchmark.py service --url http://host:8000
+    python benchmark.py service --synthetic --concurrency 1,8,32 --output bench.json
+    python benchmark.py service --compare bench.json   # 이전 결과 대비 회귀 검사
+    python benchmark.py parser                      # text_analyze 초당 처리 줄 수
+    python benchmark.py startup --fast-start        # 새 프로세스의 main 임포트 / 시작 / 준비 시간
+    python benchmark.py mosaic --backend vision     # 이미지별 OCR vs 캔버스 묶음 OCR 정확도 / 요청 수
+    python benchmark.py forward --outage 1:3        # 가짜 백엔드로 결과 전달 (묶음 / 재시도 / 파일 기록 후 재전송)
+    python benchmark.py forward --serve --port 8080 # 가짜 백엔드만 실행 (FORWARD_URL=http://localhost:8080/results)
+    python benchmark.py catalog --skus 300000       # 가상 카탈로그 색인 생성 / 조회 지연 / 정확도
+
+결과는 JSON으로 출력 (처리량, p50/p95/p99 지연, 단계별 CPU 시간, 최대 RSS)
+"""
+import argparse, asyncio, glob, io, json, os, platform, random, resource, subprocess, sys, time
+
+# 가격표 OCR 결과 예시 (parser 벤치마크용)
+SAMPLE_TEXTS = [
+    "오뚜기\n진라면 매운맛 120g\n3,500원\n100g당 2,916원\n8801045570112\n행사기간 2025.03.01~03.31",
+    "(해태) 홈런볼 초코 46g\n1,500\n단위가격 10g당 326원\n8801019606557",
+    "농심 신라면 멀티 5입\n4,980원\n행사상품\n2025-04-01",
+    "동원참치 라이트 스탠다드\n150G x 3\n8,900\n기준가격 9,900원",
+    "오징어땅콩\n오리온 98g\n2,400원\n8801117752804",
+    "프링글스 오리지널\n110g\n3 ,200\n1,000원 할인",
+]
+
+
+# 새 인터프리터에서 main 임포트 + startup 이벤트 + 예열 완료까지 시간 측정 (startup 벤치마크용)
+STARTUP_PROBE = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+heavy = [m for m in %r if m in sys.modules]
+
+async def boot():
+    await main.startup_event()
+    started = time.perf_counter()
+    task = getattr(main.app.state, "warmup_task", None)
+    if task is not None:
+        await task
+    ready = time.perf_counter()
+    await main.shutdown_event()
+    return started, ready
+
+started, ready = asyncio.run(boot())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "ready_ms": (ready - imported) * 1000,
+    "heavy_modules": heavy,
+    "backends": main.backend_states,
+}))
+"""
+HEAVY_MODULES = ("google.cloud.vision", "google.api_core.exceptions", "grpc", "requests", "PIL.Image")
+
+
+def load_images(image_dir, synthetic=False):
+    images = []
+    for path in sorted(glob.glob(os.path.join(image_dir, "*"))):
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), f.read()))
+
+    if synthetic:
+        # 고해상도 휴대폰 사진 (12MP) 크기로 키운 변형 추가
+        from PIL import Image
+        for name, data in list(images):
+            img = Image.open(io.BytesIO(data)).convert("RGB")
+            size = (4032, 3024) if img.width >= img.height else (3024, 4032)
+            out = io.BytesIO()
+            img.resize(size).save(out, format="JPEG", quality=92)
+            images.append((f"12mp_{name}.jpg", out.getvalue()))
+    return images
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(p / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def summarize(values):
+    return {
+        "mean_ms": sum(values) / len(values),
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+    }
+
+
+def peak_rss_mb():
+    # 리눅스 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def import_app(args):
+    # main 임포트 전에 OCR 백엔드 / 캐시 설정
+    os.environ["OCR_BACKEND"] = args.backend
+    os.environ["OCR_FAKE_LATENCY"] = args.ocr_latency
+    if not args.cache:
+        os.environ["OCR_CACHE_SIZE"] = "0"
+        os.environ.pop("OCR_CACHE_DB", None)
+        # 바이트만 다른 같은 이미지는 지각 해시 근접 검색에 걸리므로 함께 끔
+        os.environ["PHASH_INDEX_SIZE"] = "0"
+    import main
+    return main
+
+
+def stage_profile(main, images, repeat):
+    """단계별 CPU 시간 (decode/orient/convert/enhance/resize/encode/ocr/parse)"""
+    backend = main.get_backend()
+    stages = {}
+    for _ in range(repeat):
+        for _, data in images:
+            prep = main.preprocess_image(data)
+            for name, ms in prep.cpu_timings.items():
+                stages.setdefault(name, []).append(ms)
+
+            cpu = time.thread_time()
+            texts = backend.detect(prep.content)
+            stages.setdefault("ocr", []).append((time.thread_time() - cpu) * 1000)
+
+            cpu = time.thread_time()
+            main.text_analyze(texts)
+            stages.setdefault("parse", []).append((time.thread_time() - cpu) * 1000)
+    return {name: summarize(values) for name, values in stages.items()}
+
+
+async def run_level(client, path, images, concurrency, total, unique):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            name, data = images[i % len(images)]
+            if unique:
+                # 뒤에 붙은 바이트는 디코더가 무시하므로 캐시만 피해감
+                data = data + f"#{i}".encode()
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, files={"file": (name, data)})
+                if response.status_code != 200:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    cpu = time.process_time()
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": total / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        # 앱 내부 실행일 때만 서버 CPU 포함
+        "cpu_ms_per_request": (time.process_time() - cpu) * 1000 / total,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def run_load(args, images, main=None):
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout,
+                                   limits=httpx.Limits(max_connections=max(args.concurrency)))
+    else:
+        await main.startup_event()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app),
+                                   base_url="http://bench", timeout=args.timeout)
+
+    results = []
+    try:
+        async with client:
+            # 워밍업
+            await run_level(client, args.path, images, 1, min(len(images), 4), not args.cache)
+            for concurrency in args.concurrency:
+                total = args.requests or concurrency * 8
+                results.append(await run_level(client, args.path, images, concurrency, total, not args.cache))
+    finally:
+        if not args.url:
+            await main.shutdown_event()
+    return results
+
+
+def compare(current, baseline, tolerance):
+    """처리량 감소 / p95 증가가 허용 범위를 넘으면 회귀 목록 반환"""
+    regressions = []
+    old_levels = {level["concurrency"]: level for level in baseline.get("load", [])}
+    for level in current.get("load", []):
+        old = old_levels.get(level["concurrency"])
+        if not old:
+            continue
+        if level["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"c={level['concurrency']} throughput {old['throughput_rps']:.1f} -> {level['throughput_rps']:.1f} rps")
+        if level["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"c={level['concurrency']} p95 {old['p95_ms']:.1f} -> {level['p95_ms']:.1f} ms")
+    return regressions
+
+
+def cmd_service(args):
+    images = load_images(args.images, args.synthetic)
+    report = {
+        "meta": {
+            "benchmark": "service",
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "mode": "http" if args.url else "in-process",
+            "backend": args.backend,
+            "ocr_latency": args.ocr_latency,
+            "images": len(images),
+        },
+    }
+
+    main = None
+    if not args.url:
+        main = import_app(args)
+        report["stages"] = stage_profile(main, images, args.repeat)
+    report["load"] = asyncio.run(run_load(args, images, main))
+    return report
+
+
+def cmd_startup(args):
+    env = {**os.environ, "OCR_BACKEND": args.backend, "FAST_START": "1" if args.fast_start else "0",
+           "OCR_CACHE_SIZE": "0", "VISION_WARMUP": "1" if args.warmup else "0"}
+    env.pop("OCR_CACHE_DB", None)
+    probe = STARTUP_PROBE % (HEAVY_MODULES,)
+    root = os.path.dirname(os.path.abspath(__file__))
+
+    runs = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", probe], cwd=root, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        # 프로세스 전체 시간 (인터프리터 시작 + 종료 포함)
+        runs.append({**json.loads(out.strip().splitlines()[-1]), "process_ms": (time.perf_counter() - start) * 1000})
+
+    report = {
+        "meta": {
+            "benchmark": "startup",
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "backend": args.backend,
+            "fast_start": args.fast_start,
+            "warmup": args.warmup,
+            "runs": args.runs,
+        },
+        "heavy_modules": runs[-1]["heavy_modules"],
+        "backends": runs[-1]["backends"],
+    }
+    for key in ("import_ms", "startup_ms", "ready_ms", "process_ms"):
+        report[key] = summarize([run[key] for run in runs])
+    return report
+
+
+def cmd_mosaic(args):
+    """같은 첫 단계 전처리 결과를 이미지별로 OCR한 결과와 캔버스에 모아 OCR한 결과 비교"""
+    os.environ["MOSAIC_ENABLED"] = "1"
+    main = import_app(args)
+    import mosaic
+
+    config = main.mosaic_config
+    config.max_tile = args.max_tile
+    config.canvas = args.canvas
+    backend = main.get_backend()
+    images = load_images(args.images)
+    preps = [main.preprocess_image(data) for _, data in images]
+    contents = [p.content for p in preps]
+
+    start = time.perf_counter()
+    single = main.run_ocr_batch(backend, contents)
+    single_ms = (time.perf_counter() - start) * 1000
+
+    packing = mosaic.plan([p.size for p in preps], config)
+    start = time.perf_counter()
+    packed = main.run_ocr_packed(backend, contents, [None] * len(contents), packing)
+    packed_ms = (time.perf_counter() - start) * 1000
+
+    fields = ("title", "price", "volume", "brand")
+    in_canvas = {p.index for canvas in packing[1] for p in canvas.placements}
+    items = []
+    for n, ((name, _), a, b) in enumerate(zip(images, single, packed)):
+        if isinstance(a, Exception) or isinstance(b, Exception):
+            items.append({"image": name, "packed": n in in_canvas, "error": str(a if isinstance(a, Exception) else b)})
+            continue
+        a, b = main.text_analyze(a), main.text_analyze(b)
+        items.append({
+            "image": name,
+            "packed": n in in_canvas,
+            "single": dict(zip(fields, a)),
+            "mosaic": dict(zip(fields, b)),
+            "match": {field: x == y for field, x, y in zip(fields, a, b)},
+        })
+
+    compared = [item for item in items if item["packed"] and "match" in item]
+    backend.close()
+    return {
+        "meta": {
+            "benchmark": "mosaic",
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "backend": args.backend,
+            "max_tile": config.max_tile,
+            "canvas": config.canvas,
+            "images": len(images),
+            "packed_images": len(in_canvas),
+        },
+        # OCR 요청(과금) 단위 이미지 수
+        "requests": {"single": len(images), "mosaic": len(packing[0]) + len(packing[1])},
+        "elapsed_ms": {"single": single_ms, "mosaic": packed_ms},
+        # 캔버스에 들어간 이미지 중 필드별로 이미지별 OCR과 결과가 같은 비율
+        "agreement": {
+            field: sum(item["match"][field] for item in compared) / len(compared) if compared else None
+            for field in fields
+        },
+        "items": items,
+    }
+
+
+def stub_backend(latency_ms=0.0, fail_rate=0.0):
+    """결과 전달 테스트용 가짜 백엔드 (POST /results, 받은 scan_id 기록, state.down이면 503)"""
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    app = FastAPI()
+    app.state.down = False
+    app.state.received = []
+    app.state.batches = 0
+
+    @app.post("/results")
+    async def receive(request: Request):
+        if app.state.down or random.random() < fail_rate:
+            return JSONResponse(status_code=503, content={"message": "unavailable"})
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        body = await request.json()
+        app.state.received.extend(record["scan_id"] for record in body["results"])
+        app.state.batches += 1
+        return {"received": len(body["results"])}
+
+    return app
+
+
+async def serve_stub(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task, server.servers[0].sockets[0].getsockname()[1]
+
+
+async def run_forward(args):
+    import tempfile
+    from forwarder import ResultForwarder
+
+    app = stub_backend(args.latency, args.fail_rate)
+    server, task, port = await serve_stub(app, args.port)
+    if args.serve:
+        print(f"http://127.0.0.1:{port}/results", file=sys.stderr)
+        await task
+        return None
+
+    spill_dir = tempfile.mkdtemp(prefix="forward-")
+    forwarder = ResultForwarder(f"http://127.0.0.1:{port}/results", batch_size=args.batch_size,
+                                flush_interval=args.flush_interval, max_buffer=args.max_buffer,
+                                spill_path=os.path.join(spill_dir, "spill.jsonl"),
+                                replay_interval=args.replay_interval)
+    forwarder.start()
+    outage = [float(v) for v in args.outage.split(":")] if args.outage else None
+
+    submit_us = []
+    start = time.perf_counter()
+    for i in range(args.records):
+        elapsed = time.perf_counter() - start
+        if outage:
+            app.state.down = outage[0] <= elapsed < outage[1]
+        t = time.perf_counter()
+        forwarder.submit({"scan_id": f"{i}", "timestamp": time.time(), "ref": None, "filename": f"{i}.jpg",
+                          "result": {"title": "진라면", "price": 3500, "volume": "120g", "brand": "오뚜기"},
+                          "tier": "fast"})
+        submit_us.append((time.perf_counter() - t) * 1e6)
+        # 일정 간격으로 제출
+        await asyncio.sleep(max(0.0, (i + 1) / args.rate - (time.perf_counter() - start)))
+    submitted = time.perf_counter() - start
+    if outage:
+        while time.perf_counter() - start < outage[1]:
+            await asyncio.sleep(0.05)
+        app.state.down = False
+
+    # 모두 도착할 때까지 (파일에 기록된 결과는 replay_interval마다 재전송)
+    while len(set(app.state.received)) < args.records and time.perf_counter() - start < submitted + args.drain_timeout:
+        await asyncio.sleep(0.05)
+    drained = time.perf_counter() - start
+    await forwarder.stop()
+    server.should_exit = True
+    await task
+
+    unique = len(set(app.state.received))
+    return {
+        "meta": {
+            "benchmark": "forward",
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "records": args.records,
+            "rate": args.rate,
+            "batch_size": args.batch_size,
+            "flush_interval": args.flush_interval,
+            "outage": args.outage,
+            "fail_rate": args.fail_rate,
+        },
+        # submit()은 요청 처리 경로에서 호출되므로 짧아야 함
+        "submit_us": {"p50": percentile(submit_us, 50), "p99": percentile(submit_us, 99), "max": max(submit_us)},
+        "delivered": unique,
+        "duplicates": len(app.state.received) - unique,
+        "backend_requests": app.state.batches,
+        "records_per_request": len(app.state.received) / max(1, app.state.batches),
+        "submit_sec": submitted,
+        "drain_sec": drained,
+        "forwarder": forwarder.stats,
+    }
+
+
+def cmd_forward(args):
+    return asyncio.run(run_forward(args))
+
+
+def synthetic_products(n, seed=0):
+    """가상 상품 목록 (브랜드 + 2~4 단어 상품명 + 용량)"""
+    from catalog import Product
+    from text_parser import load_brands
+
+    rng = random.Random(seed)
+    brands = load_brands() + synthetic_brands(max(1, n // 200), seed)
+    words = ["".join(chr(rng.randint(0xAC00, 0xD7A3)) for _ in range(rng.randint(2, 4))) for _ in range(max(50, n // 20))]
+    units = ["g", "ml", "kg", "L"]
+    return [
+        Product(str(i), " ".join(rng.choice(words) for _ in range(rng.randint(2, 4))), rng.choice(brands),
+                f"{rng.choice([50, 100, 120, 250, 500, 1, 2])}{rng.choice(units)}")
+        for i in range(n)
+    ]
+
+
+def ocr_noise(name, rng):
+    """OCR 오류 흉내: 뒤 글자 잘림 / 한 글자 바뀜 / 띄어쓰기 없음"""
+    kind = rng.randrange(3)
+    if kind == 0 and len(name) > 4:
+        return name[:max(3, len(name) - rng.randint(1, 2))]
+    if kind == 1:
+        i = rng.randrange(len(name))
+        return name[:i] + chr(rng.randint(0xAC00, 0xD7A3)) + name[i + 1:]
+    return name.replace(" ", "")
+
+
+def cmd_catalog(args):
+    import tempfile
+    from catalog import Catalog, build
+
+    products = synthetic_products(args.skus, args.seed)
+    start = time.perf_counter()
+    data = build(products)
+    build_sec = time.perf_counter() - start
+    path = os.path.join(tempfile.mkdtemp(prefix="catalog-"), "catalog.idx")
+    with open(path, "wb") as f:
+        f.write(data)
+    start = time.perf_counter()
+    catalog = Catalog.load(path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(args.seed + 1)
+    results = {}
+    for mode in ("brand_volume", "title_only"):
+        latencies = []
+        correct = 0
+        for _ in range(args.queries):
+            product = rng.choice(products)
+            title = ocr_noise(product.name, rng)
+            start = time.perf_counter()
+            if mode == "brand_volume":
+                match = catalog.match(title, product.brand, product.volume)
+            else:
+                match = catalog.match(title)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            correct += match is not None and match.product.id == product.id
+        results[mode] = {
+            "p50_us": percentile(latencies, 50),
+            "p99_us": percentile(latencies, 99),
+            "accuracy": correct / args.queries,
+        }
+
+    return {
+        "meta": {
+            "benchmark": "catalog",
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "skus": args.skus,
+            "queries": args.queries,
+        },
+        "build_sec": build_sec,
+        "index_mb": len(data) / 1024 / 1024,
+        "load_ms": load_ms,
+        "lookup": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def parser_corpus(records_dir):
+    # 기록된 OCR 응답이 있으면 사용, 없으면 내장 예시
+    texts = []
+    for path in sorted(glob.glob(os.path.join(records_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+        if record["texts"]:
+            texts.append(record["texts"][0]["description"])
+    return texts or SAMPLE_TEXTS
+
+
+def synthetic_brands(n, seed=0):
+    rng = random.Random(seed)
+    return ["".join(chr(rng.randint(0xAC00, 0xD7A3)) for _ in range(rng.randint(2, 5))) for _ in range(n)]
+
+
+def cmd_parser(args):
+    from ocr_backend import TextAnnotation
+    from text_parser import TextParser, load_brands
+
+    corpus = [[TextAnnotation(text, None)] for text in parser_corpus(args.records)]
+    n_lines = sum(len([l for l in t[0].description.split("\n") if l.strip()]) for t in corpus)
+    brands = load_brands()
+
+    results = []
+    for extra in args.extra_brands:
+        parser = TextParser(brands + synthetic_brands(extra))
+        for texts in corpus:
+            parser.analyze(texts)  # 워밍업 (DFA 전이 캐시)
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for texts in corpus:
+                parser.analyze(texts)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "brands": len(parser.brands),
+            "texts_per_sec": args.iterations * len(corpus) / elapsed,
+            "lines_per_sec": args.iterations * n_lines / elapsed,
+        })
+
+    return {
+        "meta": {
+            "benchmark": "parser",
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "texts": len(corpus),
+            "lines": n_lines,
+        },
+        "parser": results,
+    }
+
+
+def write_report(report, args):
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"[회귀] {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="가격표 분석 서비스 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    service = sub.add_parser("service", help="/analyze/ 부하 테스트 + 단계별 CPU 시간")
+    service.add_argument("--url", help="HTTP로 실행 중인 서버 주소 (없으면 앱 내부 호출)")
+    service.add_argument("--path", default="/analyze/")
+    service.add_argument("--images", default="image")
+    service.add_argument("--synthetic", action="store_true", help="12MP 고해상도 변형 이미지 추가")
+    service.add_argument("--backend", default="fake", help="앱 내부 호출 시 OCR 백엔드")
+    service.add_argument("--ocr-latency", default="fixed:150", help="fake/replay OCR 지연 분포")
+    service.add_argument("--concurrency", default="1,4,16",
+                         type=lambda s: [int(v) for v in s.split(",")])
+    service.add_argument("--requests", type=int, default=0, help="단계별 요청 수 (기본: 동시성 x 8)")
+    service.add_argument("--repeat", type=int, default=3, help="단계별 CPU 측정 반복 횟수")
+    service.add_argument("--cache", action="store_true", help="OCR 캐시 + 근접 중복 검색 사용 (기본: 요청마다 다른 바이트, 둘 다 끔)")
+    service.add_argument("--timeout", type=float, default=60.0)
+    service.set_defaults(func=cmd_service)
+
+    parser_ = sub.add_parser("parser", help="text_analyze 마이크로벤치마크 (lines/sec)")
+    parser_.add_argument("--records", default="ocr_records", help="기록된 OCR 응답 디렉터리")
+    parser_.add_argument("--iterations", type=int, default=2000)
+    parser_.add_argument("--extra-brands", default="0,1000,10000",
+                         type=lambda s: [int(v) for v in s.split(",")],
+                         help="사전에 추가할 가상 브랜드 수 (사전 크기별 측정)")
+    parser_.set_defaults(func=cmd_parser)
+
+    startup = sub.add_parser("startup", help="콜드 스타트 시간 (새 프로세스에서 임포트 / 시작 / 예열)")
+    startup.add_argument("--backend", default="fake", help="OCR 백엔드")
+    startup.add_argument("--fast-start", action="store_true", help="FAST_START=1 (예열을 백그라운드에서)")
+    startup.add_argument("--warmup", action="store_true", help="VISION_WARMUP=1 (gRPC 연결까지 예열)")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.set_defaults(func=cmd_startup)
+
+    mosaic_ = sub.add_parser("mosaic", help="캔버스 묶음 OCR 정확도 / 요청 수 비교 (실제 OCR 백엔드 필요)")
+    mosaic_.add_argument("--images", default="image")
+    mosaic_.add_argument("--backend", default="vision", help="OCR 백엔드")
+    mosaic_.add_argument("--ocr-latency", default="none", help="fake/replay OCR 지연 분포")
+    mosaic_.add_argument("--max-tile", type=int, default=640, help="캔버스에 넣을 이미지 최대 긴 변")
+    mosaic_.add_argument("--canvas", type=int, default=2048, help="캔버스 최대 가로/세로")
+    mosaic_.set_defaults(func=cmd_mosaic, cache=False)
+
+    forward = sub.add_parser("forward", help="결과 전달 (가짜 백엔드 대상 묶음 / 재시도 / 파일 기록 후 재전송)")
+    forward.add_argument("--serve", action="store_true", help="가짜 백엔드만 실행")
+    forward.add_argument("--port", type=int, default=0, help="가짜 백엔드 포트 (0: 임의)")
+    forward.add_argument("--records", type=int, default=2000)
+    forward.add_argument("--rate", type=float, default=500.0, help="초당 제출 수")
+    forward.add_argument("--batch-size", type=int, default=50)
+    forward.add_argument("--flush-interval", type=float, default=0.5)
+    forward.add_argument("--max-buffer", type=int, default=10000)
+    forward.add_argument("--replay-interval", type=float, default=1.0)
+    forward.add_argument("--latency", type=float, default=20.0, help="가짜 백엔드 응답 지연 (ms)")
+    forward.add_argument("--fail-rate", type=float, default=0.0, help="가짜 백엔드 503 비율")
+    forward.add_argument("--outage", help="가짜 백엔드 중단 구간 START:END (초)")
+    forward.add_argument("--drain-timeout", type=float, default=30.0)
+    forward.set_defaults(func=cmd_forward)
+
+    catalog = sub.add_parser("catalog", help="상품 카탈로그 색인 조회 지연 / 정확도 (가상 상품)")
+    catalog.add_argument("--skus", type=int, default=300000)
+    catalog.add_argument("--queries", type=int, default=2000)
+    catalog.add_argument("--seed", type=int, default=0)
+    catalog.set_defaults(func=cmd_catalog)
+
+    for p in sub.choices.values():
+        p.add_argument("--output", help="결과 JSON 파일 (기본: 표준 출력)")
+        p.add_argument("--compare", help="비교할 이전 결과 JSON")
+        p.add_argument("--tolerance", type=float, default=0.1, help="회귀 판정 허용 비율")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = args.func(args)
+    if report is not None:
+        write_report(report, args)
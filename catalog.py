@@ -0,0 +1,257 @@
+"""상품 카탈로그 (OCR 상품명 -> 표준 상품명 매칭)
+
+    python catalog.py build products.csv catalog.idx    # CSV(name, brand, volume, id 열) 또는 .jsonl
+
+자모 단위 n-gram 역색인. 미리 만든 .idx 파일은 mmap으로 열어 바로 사용 (CATALOG_PATH)
+"""
+import argparse, bisect, csv, json, logging, mmap, os, re, struct, sys, time, unicodedata, zlib
+from array import array
+from collections import Counter, namedtuple
+
+logger = logging.getLogger("analysis.catalog")
+
+Product = namedtuple("Product", ["id", "name", "brand", "volume"])
+Match = namedtuple("Match", ["product", "score"])
+
+MAGIC = b"CATALOG1"
+# magic, n-gram 크기, 상품 수, n-gram 키 수, posting 수, 범위 키 수, 상품 정보 바이트 수
+HEADER = struct.Struct("<8sIIIIII")
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+VOLUME_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(ml|kg|g|l|ℓ)", re.IGNORECASE)
+
+
+def normalize(text):
+    """소문자 + 한글 음절을 자모로 분해 (NFD) + 글자/숫자 외 제거"""
+    return NON_WORD_PATTERN.sub("", unicodedata.normalize("NFD", (text or "").lower()))
+
+
+def normalize_volume(volume):
+    match = VOLUME_PATTERN.search(volume or "")
+    if not match:
+        return None
+    unit = match.group(2).lower().replace("ℓ", "l")
+    return f"{float(match.group(1)):g}{unit}"
+
+
+def ngrams(text, n=3):
+    """정규화된 문자열의 n-gram 집합 (n보다 짧으면 문자열 전체)"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def key(*parts):
+    return zlib.crc32("\x00".join(parts).encode("utf-8"))
+
+
+def similarity(a, b):
+    """질의 n-gram a 중 상품명 n-gram b에 있는 비율, 같으면 Dice 계수로 비교하는 (비율, Dice) 쌍
+
+    잘린 OCR 상품명("진라면")도 전체 상품명("진라면 매운맛")과 1.0이 되고,
+    짧은 다른 상품("신라면")보다 앞섬. 전체가 일치하는 상품은 Dice로 더 긴 상품보다 앞섬
+    """
+    if not a or not b:
+        return 0.0, 0.0
+    shared = len(a & b)
+    return shared / len(a), 2 * shared / (len(a) + len(b))
+
+
+def read_products(path):
+    """CSV(name, brand, volume, id 열) 또는 JSONL에서 Product 순회"""
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+    for n, row in enumerate(rows):
+        if row.get("name"):
+            yield Product(str(row.get("id") or n), row["name"], row.get("brand") or "", row.get("volume") or "")
+
+
+def build(products, n=3):
+    """Product 목록 -> 색인 바이트 (Catalog(바이트) 또는 파일로 저장해 mmap)
+
+    상품을 (브랜드, 용량) 순으로 정렬해 번호를 매기므로 한 브랜드 / 브랜드 + 용량의 상품은
+    연속된 번호 범위. n-gram 키마다 정렬된 상품 번호 목록(uint32)을 두고, 브랜드를 알면
+    각 목록에서 그 범위만 잘라 훑음
+    """
+    rows = sorted(((normalize(p.brand), normalize_volume(p.volume) or "", p) for p in products),
+                  key=lambda row: row[:2])
+    postings = {}
+    ranges = {}
+    blob = bytearray()
+    doc_offsets = array("I", [0])
+    for doc, (brand, volume, product) in enumerate(rows):
+        for gram in ngrams(normalize(product.name), n):
+            postings.setdefault(key(gram), array("I")).append(doc)
+        if brand:
+            for scope in (key("brand", brand), key("brand", brand, volume)):
+                ranges.setdefault(scope, [doc, doc])[1] = doc + 1
+        blob += json.dumps(list(product), ensure_ascii=False).encode("utf-8")
+        doc_offsets.append(len(blob))
+
+    gram_keys = array("I", sorted(postings))
+    offsets = array("I", [0])
+    for k in gram_keys:
+        offsets.append(offsets[-1] + len(postings[k]))
+    range_keys = array("I", sorted(ranges))
+    bounds = array("I", [v for k in range_keys for v in ranges[k]])
+
+    out = bytearray(HEADER.pack(MAGIC, n, len(rows), len(gram_keys), offsets[-1], len(range_keys), len(blob)))
+    for part in (gram_keys, offsets, *(postings[k] for k in gram_keys), range_keys, bounds, doc_offsets):
+        out += part.tobytes()
+    out += blob
+    return bytes(out)
+
+
+class Catalog:
+    """자모 n-gram 역색인 검색
+
+    드문 n-gram부터 posting을 합산해 후보를 모으고(흔한 n-gram은 scan_budget을 넘으면 생략),
+    후보 상위 verify개만 상품명 전체 n-gram과 다시 비교 (similarity)
+    """
+
+    def __init__(self, buffer, scan_budget=1500, verify=8, min_score=0.5):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic, self.n, n_docs, n_keys, n_postings, n_ranges, _ = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("카탈로그 색인 파일 형식이 아닙니다")
+        position = HEADER.size
+
+        def take(count):
+            nonlocal position
+            part = view[position:position + count * 4].cast("I")
+            position += count * 4
+            return part
+
+        self._keys = take(n_keys)
+        self._offsets = take(n_keys + 1)
+        self._postings = take(n_postings)
+        self._range_keys = take(n_ranges)
+        self._bounds = take(n_ranges * 2)
+        self._docs = take(n_docs + 1)
+        self._blob = view[position:]
+        self.scan_budget = scan_budget
+        self.verify = verify
+        self.min_score = min_score
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        # 색인 파일을 mmap으로 열어 필요한 부분만 읽음 (여러 워커 프로세스가 페이지 캐시 공유)
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, **kwargs)
+
+    @classmethod
+    def from_products(cls, products, **kwargs):
+        return cls(build(products), **kwargs)
+
+    def __len__(self):
+        return len(self._docs) - 1
+
+    def product(self, doc):
+        return Product(*json.loads(bytes(self._blob[self._docs[doc]:self._docs[doc + 1]])))
+
+    def _range(self, k):
+        # 브랜드 (+ 용량) 상품 번호 범위 [lo, hi), 없으면 None
+        i = bisect.bisect_left(self._range_keys, k)
+        if i == len(self._range_keys) or self._range_keys[i] != k:
+            return None
+        return self._bounds[2 * i], self._bounds[2 * i + 1]
+
+    def _posting(self, k, lo=None, hi=None):
+        i = bisect.bisect_left(self._keys, k)
+        if i == len(self._keys) or self._keys[i] != k:
+            return None
+        posting = self._postings[self._offsets[i]:self._offsets[i + 1]]
+        if lo is not None:
+            posting = posting[bisect.bisect_left(posting, lo):bisect.bisect_left(posting, hi)]
+        return posting
+
+    def _candidates(self, grams, lo=None, hi=None):
+        lists = [p for p in (self._posting(key(g), lo, hi) for g in grams) if p]
+        lists.sort(key=len)
+        counts = Counter()
+        scanned = 0
+        for posting in lists:
+            if counts and scanned + len(posting) > self.scan_budget:
+                break
+            counts.update(posting)
+            scanned += len(posting)
+        return [doc for doc, _ in counts.most_common(self.verify)]
+
+    def _best(self, grams, docs):
+        best, best_rank = None, None
+        for doc in docs:
+            product = self.product(doc)
+            rank = similarity(grams, ngrams(normalize(product.name), self.n))
+            if best is None or rank > best_rank:
+                best, best_rank = Match(product, rank[0]), rank
+        return best if best is not None and best.score >= self.min_score else None
+
+    def match(self, title, brand=None, volume=None):
+        """가장 비슷한 Match(product, score), min_score 미만이면 None
+
+        브랜드 + 용량, 브랜드 범위 안에서 먼저 찾고 없으면 전체에서 찾음
+        (OCR이 브랜드/용량을 잘못 읽었거나 카탈로그에 없는 경우)
+        """
+        grams = ngrams(normalize(title), self.n)
+        if not grams:
+            return None
+        scopes = []
+        brand = normalize(brand)
+        if brand:
+            volume = normalize_volume(volume)
+            if volume:
+                scopes.append(self._range(key("brand", brand, volume)))
+            scopes.append(self._range(key("brand", brand)))
+        for scope in scopes:
+            if scope is not None:
+                match = self._best(grams, self._candidates(grams, *scope))
+                if match is not None:
+                    return match
+        return self._best(grams, self._candidates(grams))
+
+
+def from_env():
+    """CATALOG_PATH: .idx(미리 만든 색인, mmap) 또는 CSV/JSONL(시작 시 색인 생성), 없으면 None"""
+    path = os.environ.get("CATALOG_PATH")
+    if not path:
+        return None
+    kwargs = {
+        "min_score": float(os.environ.get("CATALOG_MIN_SCORE", "0.5")),
+        # 후보를 모을 때 훑는 최대 posting 수 (클수록 정확하지만 느림)
+        "scan_budget": int(os.environ.get("CATALOG_SCAN_BUDGET", "1500")),
+    }
+    start = time.perf_counter()
+    if path.endswith(".idx"):
+        catalog = Catalog.load(path, **kwargs)
+    else:
+        catalog = Catalog.from_products(read_products(path), **kwargs)
+    logger.info("카탈로그 %d개 상품 로드 (%.0fms)", len(catalog), (time.perf_counter() - start) * 1000)
+    return catalog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="상품 카탈로그 색인")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_ = sub.add_parser("build", help="CSV/JSONL -> 색인 파일 (.idx)")
+    build_.add_argument("source")
+    build_.add_argument("output")
+    build_.add_argument("--ngram", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    data = build(read_products(args.source), args.ngram)
+    tmp = args.output + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, args.output)
+    print(f"{len(Catalog(data))}개 상품, {len(data) / 1024 / 1024:.1f}MB, {time.perf_counter() - start:.1f}초",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
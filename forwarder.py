@@ -0,0 +1,204 @@
+import asyncio, json, logging, os, random, time
+
+logger = logging.getLogger("analysis.forwarder")
+
+
+class ResultForwarder:
+    """분석 결과를 백엔드로 묶어서 전달 (이벤트 루프 안에서만 사용)
+
+    submit()은 버퍼에 넣기만 하고 바로 반환. 버퍼의 결과를 batch_size개 또는 flush_interval초
+    단위로 모아 연결 풀을 쓰는 httpx.AsyncClient로 POST {"results": [...]}.
+    재시도 후에도 실패하거나 버퍼가 가득 차면 spill_path(JSONL)에 기록하고,
+    백엔드가 다시 응답하면 기록된 결과를 다시 전달
+    """
+
+    def __init__(self, url, batch_size=50, flush_interval=0.5, max_buffer=10000, retries=3,
+                 backoff_base=0.5, backoff_max=10.0, timeout=5.0, max_connections=10,
+                 spill_path="forward_spill.jsonl", replay_interval=5.0):
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.spill_path = spill_path
+        self.replay_interval = replay_interval
+        self.client = None
+        self._buffer = None
+        self._task = None
+        self._replayed_at = 0.0
+        self.stats = {"submitted": 0, "forwarded": 0, "batches": 0, "retries": 0, "spilled": 0,
+                      "replayed": 0, "dropped": 0}
+
+    @classmethod
+    def from_env(cls):
+        """FORWARD_URL이 없으면 None (전달 비활성)"""
+        url = os.environ.get("FORWARD_URL")
+        if not url:
+            return None
+        return cls(
+            url,
+            batch_size=int(os.environ.get("FORWARD_BATCH_SIZE", "50")),
+            # 첫 결과가 들어온 뒤 묶음을 보내기까지 기다리는 최대 시간 (초)
+            flush_interval=float(os.environ.get("FORWARD_FLUSH_INTERVAL", "0.5")),
+            max_buffer=int(os.environ.get("FORWARD_MAX_BUFFER", "10000")),
+            retries=int(os.environ.get("FORWARD_RETRIES", "3")),
+            timeout=float(os.environ.get("FORWARD_TIMEOUT", "5")),
+            max_connections=int(os.environ.get("FORWARD_MAX_CONNECTIONS", "10")),
+            spill_path=os.environ.get("FORWARD_SPILL_PATH", "forward_spill.jsonl"),
+        )
+
+    def start(self):
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+        )
+        self._buffer = asyncio.Queue(self.max_buffer)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """남은 결과를 보내고(실패 시 파일에 기록) 연결 종료"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        records = []
+        while self._buffer is not None and not self._buffer.empty():
+            records.append(self._buffer.get_nowait())
+        for i in range(0, len(records), self.batch_size):
+            batch = records[i:i + self.batch_size]
+            if not await self._send(batch, retries=0):
+                self._spill(batch)
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def depth(self):
+        return self._buffer.qsize() if self._buffer is not None else 0
+
+    def submit(self, record):
+        """결과 하나를 전달 대기열에 추가 (기다리지 않음). 버퍼가 가득 차면 바로 파일에 기록"""
+        self.stats["submitted"] += 1
+        try:
+            self._buffer.put_nowait(record)
+        except asyncio.QueueFull:
+            self._spill([record])
+
+    def backoff(self, attempt):
+        # full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _collect(self, batch):
+        # 첫 결과 이후 batch_size개가 차거나 flush_interval이 지날 때까지 모음
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._buffer.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        while True:
+            try:
+                await self._step()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # 예상하지 못한 오류 하나로 전달 작업이 멈추지 않도록 기록만 하고 계속
+                logger.exception("결과 전달 작업 오류")
+                await asyncio.sleep(self.flush_interval)
+
+    async def _step(self):
+        try:
+            first = await asyncio.wait_for(self._buffer.get(), self.replay_interval)
+        except asyncio.TimeoutError:
+            # 한가할 때 파일에 기록된 결과 재전송
+            await self._replay()
+            return
+        batch = [first]
+        try:
+            await self._collect(batch)
+            sent = await self._send(batch)
+        except BaseException:
+            # 종료 중이거나 오류가 난 묶음은 파일에 기록 (백엔드는 scan_id로 중복 제거)
+            self._spill(batch)
+            raise
+        if sent:
+            if time.monotonic() - self._replayed_at > self.replay_interval:
+                await self._replay()
+        else:
+            self._spill(batch)
+
+    async def _send(self, batch, retries=None):
+        """묶음 전송, 성공(또는 다시 보내도 소용없는 4xx) 시 True"""
+        import httpx
+
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                response = await self.client.post(self.url, json={"results": batch})
+                if response.status_code < 300:
+                    self.stats["forwarded"] += len(batch)
+                    self.stats["batches"] += 1
+                    return True
+                if response.status_code < 500 and response.status_code != 429:
+                    logger.warning("결과 전달 거부 (%d): %s", response.status_code, response.text[:200])
+                    self.stats["dropped"] += len(batch)
+                    return True
+                error = f"HTTP {response.status_code}"
+            except httpx.HTTPError as e:
+                error = repr(e)
+            if attempt < retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff(attempt))
+        logger.warning("결과 전달 실패 (%d건): %s", len(batch), error)
+        return False
+
+    def _spill(self, records):
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stats["spilled"] += len(records)
+
+    async def _replay(self):
+        self._replayed_at = time.monotonic()
+        replay_path = self.spill_path + ".replay"
+        # 이전 재전송이 중단된 파일이 남아 있으면 그것부터
+        if not os.path.exists(replay_path):
+            if not os.path.exists(self.spill_path):
+                return
+            os.replace(self.spill_path, replay_path)
+
+        records, broken = [], []
+        with open(replay_path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    broken.append(line.rstrip("\n") + "\n")
+        if broken:
+            # 기록 중 중단되어 잘린 줄 등은 .bad 파일로 옮기고 나머지만 재전송
+            with open(self.spill_path + ".bad", "a", encoding="utf-8") as f:
+                f.writelines(broken)
+            logger.warning("읽을 수 없는 기록 %d줄을 %s.bad로 옮김", len(broken), self.spill_path)
+            self.stats["dropped"] += len(broken)
+        for i in range(0, len(records), self.batch_size):
+            batch = records[i:i + self.batch_size]
+            if not await self._send(batch, retries=0):
+                # 백엔드가 아직 응답하지 않으면 남은 결과를 다시 기록
+                self._spill(records[i:])
+                self.stats["spilled"] -= len(records) - i
+                break
+            self.stats["replayed"] += len(batch)
+        os.remove(replay_path)
@@ -0,0 +1,182 @@
+import asyncio, logging, os, time, uuid
+
+logger = logging.getLogger("analysis.jobs")
+
+
+class JobQueueFull(Exception):
+    """대기열이 가득 차 작업을 받을 수 없음 (retry_after: 초)"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+class JobTooLarge(Exception):
+    """작업 하나의 이미지 수가 대기열 크기보다 커서 기다려도 받을 수 없음"""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class Job:
+    """이미지 여러 장을 묶은 분석 작업. items: 항목별 {"filename", "status", "result", "error", "tier"}"""
+
+    def __init__(self, filenames):
+        self.id = uuid.uuid4().hex
+        self.created = time.time()
+        self.finished = None
+        self.items = [{"filename": name, "status": "pending", "result": None, "error": None, "tier": None}
+                      for name in filenames]
+        self.remaining = len(filenames)
+        self.started = 0
+        self._listeners = []
+
+    @property
+    def status(self):
+        if self.remaining == 0:
+            return "done"
+        return "running" if self.started or self.remaining < len(self.items) else "queued"
+
+    def to_dict(self):
+        done = len(self.items) - self.remaining
+        return {"job_id": self.id, "status": self.status, "total": len(self.items), "completed": done,
+                "created": self.created, "finished": self.finished, "results": self.items}
+
+    def complete(self, index, result=None, error=None, tier=None):
+        self.items[index].update(status="failed" if error else "done", result=result, error=error, tier=tier)
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.finished = time.time()
+        self._publish(("item", {"index": index, **self.items[index]}))
+        if self.remaining == 0:
+            self._publish(("done", {"job_id": self.id, "status": self.status}))
+
+    def _publish(self, event):
+        for queue in self._listeners:
+            queue.put_nowait(event)
+
+    async def events(self, keepalive=15.0):
+        """SSE용 (이벤트 이름, 데이터) 순회. 이미 끝난 항목부터 보내고 완료 시 종료, keepalive초마다 (None, None)"""
+        # 이벤트 루프 안에서 await 없이 스냅샷 + 구독하므로 빠지거나 중복되는 항목 없음
+        queue = asyncio.Queue()
+        self._listeners.append(queue)
+        try:
+            for index, item in enumerate(self.items):
+                if item["status"] != "pending":
+                    yield "item", {"index": index, **item}
+            if self.remaining == 0:
+                yield "done", {"job_id": self.id, "status": self.status}
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None, None
+                    continue
+                yield event
+                if event[0] == "done":
+                    return
+        finally:
+            self._listeners.remove(queue)
+
+
+class JobManager:
+    """비동기 분석 작업 대기열 (이벤트 루프 안에서만 사용)
+
+    이미지 한 장이 대기열 항목 하나. 워커 workers개가 handler(content, backend)로 분석하고
+    handler는 (payload, OCR 단계)를 돌려줌. 끝난 작업은 ttl초 뒤 삭제
+    """
+
+    def __init__(self, handler, workers=4, max_queue=100, ttl=600):
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.jobs = {}
+        self._queue = None
+        self._tasks = []
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "expired": 0}
+
+    @classmethod
+    def from_env(cls, handler):
+        return cls(
+            handler,
+            workers=int(os.environ.get("JOB_WORKERS", "4")),
+            # 대기 중인 이미지 수 한도 (넘으면 503)
+            max_queue=int(os.environ.get("JOB_QUEUE_SIZE", "100")),
+            # 끝난 작업 결과 보관 시간 (초)
+            ttl=float(os.environ.get("JOB_TTL", "600")),
+        )
+
+    def start(self):
+        self._queue = asyncio.Queue(self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, filenames, contents, backend=None, errors=None):
+        """작업 등록 후 Job 반환. contents[i]가 None인 항목은 errors[i]로 바로 실패 처리"""
+        pending = sum(content is not None for content in contents)
+        if pending > self.max_queue:
+            self.stats["rejected"] += 1
+            raise JobTooLarge(f"작업 하나에 이미지는 최대 {self.max_queue}장까지 가능합니다")
+        if self._queue is None or self.depth() + pending > self.max_queue:
+            self.stats["rejected"] += 1
+            # 워커 수 기준 대략 한 바퀴 처리 시간
+            raise JobQueueFull("분석 대기열이 가득 찼습니다", retry_after=max(1, self.depth() // max(1, self.workers)))
+
+        job = Job(filenames)
+        self.jobs[job.id] = job
+        self.stats["submitted"] += 1
+        for index, content in enumerate(contents):
+            if content is None:
+                job.complete(index, error=(errors or {}).get(index))
+            else:
+                self._queue.put_nowait((job, index, content, backend))
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def count(self):
+        counts = {"queued": 0, "running": 0, "done": 0}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    async def _worker(self):
+        while True:
+            job, index, content, backend = await self._queue.get()
+            job.started += 1
+            try:
+                payload, tier = await self.handler(content, backend)
+                job.complete(index, result=payload, tier=tier)
+                self.stats["completed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("작업 %s 항목 %d 분석 실패: %s", job.id, index, e)
+                job.complete(index, error=f"오류 발생: {e}")
+                self.stats["failed"] += 1
+            finally:
+                self._queue.task_done()
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(min(60.0, self.ttl))
+            now = time.time()
+            expired = [job_id for job_id, job in self.jobs.items()
+                       if job.finished is not None and now - job.finished > self.ttl]
+            for job_id in expired:
+                del self.jobs[job_id]
+            self.stats["expired"] += len(expired)
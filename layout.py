@@ -0,0 +1,127 @@
+from collections import namedtuple
+from ocr_backend import box_annotation
+
+# bbox = (left, top, right, bottom), texts = Vision text_annotations와 같은 모양 (영역 전체 + 단어)
+Region = namedtuple("Region", ["bbox", "texts"])
+Word = namedtuple("Word", ["text", "left", "top", "right", "bottom"])
+
+
+def word_boxes(texts):
+    """texts[1:]의 단어별 바운딩 박스 (축 정렬 사각형)"""
+    words = []
+    for t in texts[1:]:
+        xs = [v.x for v in t.bounding_poly.vertices]
+        ys = [v.y for v in t.bounding_poly.vertices]
+        if xs and ys and t.description.strip():
+            words.append(Word(t.description, min(xs), min(ys), max(xs), max(ys)))
+    return words
+
+
+class UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def cluster_words(words, gap_x=1.5, gap_y=0.8):
+    """가까운 단어끼리 묶어 가격표 영역 단위 인덱스 목록 반환
+
+    gap_x / gap_y: 단어 높이 중앙값 대비 같은 영역으로 볼 가로/세로 간격.
+    격자 공간 해시로 주변 칸의 단어만 비교 (단어 수에 거의 선형)
+    """
+    if not words:
+        return []
+    heights = sorted(w.bottom - w.top for w in words)
+    height = max(1, heights[len(heights) // 2])
+    dx, dy = gap_x * height / 2, gap_y * height / 2
+
+    # 각 단어 박스를 간격의 절반씩 넓혀, 넓힌 박스가 겹치면 같은 영역
+    boxes = [(w.left - dx, w.top - dy, w.right + dx, w.bottom + dy) for w in words]
+    cell = 4 * height
+    grid = {}
+    uf = UnionFind(len(words))
+
+    for i, (left, top, right, bottom) in enumerate(boxes):
+        cells = [(cx, cy)
+                 for cx in range(int(left // cell), int(right // cell) + 1)
+                 for cy in range(int(top // cell), int(bottom // cell) + 1)]
+        seen = set()
+        for key in cells:
+            for j in grid.get(key, ()):
+                if j in seen:
+                    continue
+                seen.add(j)
+                l2, t2, r2, b2 = boxes[j]
+                if left <= r2 and l2 <= right and top <= b2 and t2 <= bottom:
+                    uf.union(i, j)
+        for key in cells:
+            grid.setdefault(key, []).append(i)
+
+    groups = {}
+    for i in range(len(words)):
+        groups.setdefault(uf.find(i), []).append(i)
+    return list(groups.values())
+
+
+def rebuild_lines(words):
+    """단어를 위에서 아래, 왼쪽에서 오른쪽 순으로 줄 단위 텍스트로 재구성"""
+    lines = []
+    for w in sorted(words, key=lambda w: (w.top + w.bottom) / 2):
+        center = (w.top + w.bottom) / 2
+        line = lines[-1] if lines else None
+        # 세로 중심이 현재 줄 높이 범위 안이면 같은 줄
+        if line and line["top"] <= center <= line["bottom"]:
+            line["words"].append(w)
+            line["top"] = min(line["top"], w.top)
+            line["bottom"] = max(line["bottom"], w.bottom)
+        else:
+            lines.append({"top": w.top, "bottom": w.bottom, "words": [w]})
+    return [" ".join(w.text for w in sorted(line["words"], key=lambda w: w.left)) for line in lines]
+
+
+def bounds(words):
+    return (min(w.left for w in words), min(w.top for w in words),
+            max(w.right for w in words), max(w.bottom for w in words))
+
+
+def words_to_texts(words):
+    """단어 목록 -> Vision text_annotations 모양 (전체 텍스트 + 단어), 단어가 없으면 빈 목록"""
+    if not words:
+        return []
+    full_text = "\n".join(rebuild_lines(words)) + "\n"
+    return [box_annotation(full_text, *bounds(words))] + [
+        box_annotation(w.text, w.left, w.top, w.right, w.bottom) for w in words
+    ]
+
+
+def split_regions(texts, gap_x=1.5, gap_y=0.8, min_words=2):
+    """OCR 결과를 가격표 영역별 Region 목록으로 분리 (위 -> 아래, 왼쪽 -> 오른쪽)"""
+    words = word_boxes(texts)
+    regions = []
+    for group in cluster_words(words, gap_x, gap_y):
+        if len(group) < min_words:
+            continue
+        members = [words[i] for i in group]
+        regions.append(Region(bounds(members), words_to_texts(members)))
+
+    # 같은 줄(세로 범위가 겹치는) 영역은 왼쪽부터
+    regions.sort(key=lambda r: (r.bbox[1], r.bbox[0]))
+    rows = []
+    for region in regions:
+        if rows and region.bbox[1] < rows[-1][0]:
+            rows[-1][1].append(region)
+            rows[-1][0] = max(rows[-1][0], region.bbox[3])
+        else:
+            rows.append([region.bbox[3], [region]])
+    return [region for _, row in rows for region in sorted(row, key=lambda r: r.bbox[0])]
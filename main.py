@@ -1,9 +1,23 @@
 from fastapi import FastAPI, File, UploadFile
-from fastapi.responses import JSONResponse
+from typing import List, Optional
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from google.cloud import vision
-from PIL import Image, ImageEnhance
-import io, os, re, json, requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio, cProfile, os, json, time, uuid
+import layout, metrics, mosaic, ocr_backend, ocr_cache, ocr_tiers
+import catalog as product_catalog
+from jobs import JobManager, JobQueueFull, JobTooLarge
+from forwarder import ResultForwarder
+from ocr_dispatcher import DispatchError, OCRDispatcher, error_types
+from singleflight import SingleFlight
+from phash_index import NearDuplicateIndex
+from upload import UploadRejected, probe_image, read_upload
+from preprocess import PreprocessConfig, Preprocessor
+from text_parser import TextParser
+from logging_config import setup_logging
+
+logger = setup_logging()
 
 app = FastAPI(title="가격표 이미지 분석 API")
 
@@ -19,51 +33,394 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 이미지 전처리 엔진 (파라미터는 캐시 키에 포함)
+preprocessor = Preprocessor(PreprocessConfig.from_env())
+
+# OCR 단계 (OCR_TIERS): 가벼운 전처리 + OCR을 먼저 하고, 결과가 부족할 때만 다음 단계로
+ocr_tier_list = ocr_tiers.from_env()
+tier_preprocessors = {t.name: Preprocessor(preprocessor.config.replace(**t.overrides)) for t in ocr_tier_list}
+
+# 배치 분석 시 작은 이미지를 한 캔버스에 모아 OCR (MOSAIC_ENABLED, 첫 단계에만 적용)
+mosaic_config = mosaic.MosaicConfig.from_env()
+
+# OCR 결과 캐시
+cache = ocr_cache.from_env()
+
+# Prometheus 지표 (/metrics)
+STAGE_SECONDS = metrics.registry.histogram("analysis_stage_seconds", "text_extract / text_analyze 단계별 소요 시간")
+REQUEST_SECONDS = metrics.registry.histogram("analysis_request_seconds", "분석 요청 처리 시간")
+REQUESTS_TOTAL = metrics.registry.counter("analysis_requests_total", "분석 요청 수 (경로/상태 코드별)")
+IN_FLIGHT = metrics.registry.gauge("analysis_requests_in_flight", "처리 중인 분석 요청 수")
+IMAGES_TOTAL = metrics.registry.counter("analysis_images_total", "분석한 이미지 수")
+NO_PRODUCT_TOTAL = metrics.registry.counter("analysis_no_product_total", "상품명을 찾지 못한 이미지 수")
+OCR_FAILURES_TOTAL = metrics.registry.counter("analysis_ocr_failures_total", "OCR 호출 실패 수")
+MOSAIC_IMAGES_TOTAL = metrics.registry.counter("analysis_mosaic_images_total", "캔버스에 모아 OCR한 이미지 수")
+OCR_TIER_TOTAL = metrics.registry.counter("analysis_ocr_tier_total", "결과를 낸 OCR 단계별 이미지 수 (cache / near_duplicate 포함)")
+
+
+def cache_hits():
+    stats = cache.get_stats()
+    return [({"tier": "memory"}, stats["memory_hits"]), ({"tier": "disk"}, stats["disk_hits"])]
+
+
+metrics.registry.callback("analysis_cache_hits_total", "OCR 캐시 적중 수", "counter", cache_hits)
+metrics.registry.callback("analysis_cache_misses_total", "OCR 캐시 미스 수", "counter",
+                          lambda: [({}, cache.get_stats()["misses"])])
+
+# 다시 찍은 같은 가격표 검색 (지각 해시, PHASH_INDEX_SIZE=0 이면 비활성)
+near_duplicates = NearDuplicateIndex.from_env()
+metrics.registry.callback("analysis_near_duplicate_lookups_total", "지각 해시 근접 검색 결과별 횟수", "counter",
+                          lambda: [({"result": "hit"}, near_duplicates.stats["hits"]),
+                                   ({"result": "miss"}, near_duplicates.stats["misses"])])
+
+# ?multi=true 가격표 영역 분리 기준 (단어 높이 대비 가로/세로 간격)
+LAYOUT_GAP_X = float(os.environ.get("LAYOUT_GAP_X", "1.5"))
+LAYOUT_GAP_Y = float(os.environ.get("LAYOUT_GAP_Y", "0.8"))
+
+# 동일 이미지 동시 요청 병합 (처리 중인 분석 하나를 공유)
+inflight = SingleFlight()
+metrics.registry.callback("analysis_coalesced_requests_total", "처리 중인 동일 이미지 분석을 공유한 요청 수", "counter",
+                          lambda: [({}, inflight.stats["shared"])])
+
+# 분석 결과를 백엔드로 직접 전달 (FORWARD_URL 설정 시, ?forward=true 요청만)
+forwarder = ResultForwarder.from_env()
+if forwarder is not None:
+    metrics.registry.callback("analysis_forward_total", "백엔드 결과 전달 처리 결과별 수", "counter",
+                              lambda: [({"outcome": k}, v) for k, v in forwarder.stats.items()])
+    metrics.registry.callback("analysis_forward_buffer", "백엔드로 보내기 위해 대기 중인 결과 수", "gauge",
+                              lambda: [({}, forwarder.depth())])
+
+# OCR 텍스트 분석기 (정규식/브랜드 사전은 시작 시 한 번만 컴파일)
+text_parser = TextParser()
+
+# 표준 상품명 매칭 카탈로그 (CATALOG_PATH 설정 시, 결과에 "catalog" 추가)
+catalog = product_catalog.from_env()
+CATALOG_LOOKUPS_TOTAL = metrics.registry.counter("analysis_catalog_lookups_total", "카탈로그 매칭 결과별 횟수")
+
+# ?debug=true 요청 시 응답에 분석 과정 포함 허용 여부
+DEBUG_TRACE_ENABLED = os.environ.get("DEBUG_TRACE_ENABLED", "0") == "1"
+
+# ?timing=true / ?profile=true (또는 X-Server-Timing, X-Profile 헤더) 허용 여부
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+# 업로드 크기 제한 (단일 이미지 / 배치 요청 전체, 바이트)
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+MAX_BATCH_BYTES = int(os.environ.get("MAX_BATCH_BYTES", str(100 * 1024 * 1024)))
+UPLOADS_REJECTED_TOTAL = metrics.registry.counter("analysis_uploads_rejected_total", "크기/형식 제한으로 거부된 업로드 수")
+
+# 전처리(CPU) / OCR(네트워크 I/O) 실행 풀
+PREPROCESS_WORKERS = int(os.environ.get("PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
+PREPROCESS_EXECUTOR = os.environ.get("PREPROCESS_EXECUTOR", "thread")  # thread | process
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", "16"))
+
+if PREPROCESS_EXECUTOR == "process":
+    preprocess_executor = ProcessPoolExecutor(max_workers=PREPROCESS_WORKERS)
+else:
+    preprocess_executor = ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS, thread_name_prefix="preprocess")
+ocr_executor = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+# OCR_CACHE_DB(SQLite) 조회/저장은 디스크 I/O + commit이 있으므로 이벤트 루프 밖 전용 스레드에서
+cache_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache") if cache.db_path else None
+
+# OCR 호출 동시 실행 수 / 할당량 / 대기열 / 마감 시간 / 재시도 (OCR_MAX_CONCURRENCY, OCR_RATE_LIMIT ...)
+ocr_dispatcher = OCRDispatcher.from_env(ocr_executor, default_concurrency=OCR_WORKERS)
+metrics.registry.callback("analysis_ocr_dispatch_total", "OCR 디스패처 처리 결과별 횟수", "counter",
+                          lambda: [({"outcome": k}, v) for k, v in ocr_dispatcher.stats.items()])
+metrics.registry.callback("analysis_ocr_dispatch_pending", "OCR 디스패처 실행/대기 중인 호출 수", "gauge",
+                          lambda: [({"state": "active"}, ocr_dispatcher.active),
+                                   ({"state": "waiting"}, ocr_dispatcher.waiting)])
+
+# OCR 백엔드 (OCR_BACKEND: 기본값, OCR_BACKENDS: ?backend= 로 선택 가능한 목록)
+OCR_BACKEND = os.environ.get("OCR_BACKEND", "vision")
+OCR_BACKENDS = [name.strip() for name in os.environ.get("OCR_BACKENDS", OCR_BACKEND).split(",") if name.strip()]
+VISION_WARMUP = os.environ.get("VISION_WARMUP", "1") == "1"
+# FAST_START=1: OCR 백엔드 생성/예열을 백그라운드에서 진행하고 바로 요청 수신 (준비 상태는 /ready)
+FAST_START = os.environ.get("FAST_START", "0") == "1"
+ocr_backends = {name: ocr_backend.create_backend(name) for name in dict.fromkeys([OCR_BACKEND] + OCR_BACKENDS)}
+
+# OCR_RECORD_DIR 설정 시 모든 OCR 응답을 이미지 해시별로 저장 (replay 백엔드에서 재생)
+OCR_RECORD_DIR = os.environ.get("OCR_RECORD_DIR")
+if OCR_RECORD_DIR:
+    ocr_backends = {name: ocr_backend.RecordingBackend(b, OCR_RECORD_DIR) for name, b in ocr_backends.items()}
+
+# OCR 백엔드별 준비 상태 (starting / ready / failed)
+backend_states = {name: "starting" for name in ocr_backends}
+# 예열 실패 시 다시 시도하는 최대 간격 (초)
+WARMUP_RETRY_MAX = float(os.environ.get("WARMUP_RETRY_MAX", "60"))
+warmup_retries = []
+
+
+async def warm_backend(name, backend):
+    # OCR 백엔드 생성 + 연결 예열 (Vision은 이때 google.cloud.vision을 처음 불러옴), 성공 여부 반환
+    loop = asyncio.get_running_loop()
+    try:
+        if VISION_WARMUP:
+            await loop.run_in_executor(ocr_executor, backend.warmup)
+        else:
+            await loop.run_in_executor(ocr_executor, backend.start)
+    except Exception as e:
+        backend_states[name] = "failed"
+        logger.warning("OCR 백엔드(%s) 예열 실패: %s", backend.name, e)
+        return False
+    backend_states[name] = "ready"
+    return True
+
+
+async def retry_warmup(name, backend):
+    # 성공할 때까지 지수 백오프로 다시 예열 (그동안 /ready는 503)
+    attempt = 0
+    while True:
+        await asyncio.sleep(min(WARMUP_RETRY_MAX, 2 ** attempt))
+        if await warm_backend(name, backend):
+            return
+        attempt += 1
+
+
+async def warm_backends():
+    for name, backend in ocr_backends.items():
+        if not await warm_backend(name, backend):
+            warmup_retries.append(asyncio.create_task(retry_warmup(name, backend)))
+
+
 @app.on_event("startup")
 async def startup_event():
     """애플리케이션 시작 시 Google 서비스 계정 설정"""
-    # 환경 변수에서 서비스 계정 JSON 가져오기
-    service_account_json = os.environ.get("GOOGLE_CREDENTIALS_JSON")
-    
-    if service_account_json:
-        # 환경 변수의 내용을 파일로 저장
-        with open("temp_service_account.json", "w") as f:
-            f.write(service_account_json)
-        
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "temp_service_account.json"
-    else:
+    # GOOGLE_CREDENTIALS_JSON이 있으면 Vision 백엔드가 메모리에서 인증 정보 생성 (임시 파일 없음)
+    if not os.environ.get("GOOGLE_CREDENTIALS_JSON"):
         # 로컬 개발 환경용 
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "service-account.json"
+        os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", "service-account.json")
 
+    job_manager.start()
+    if forwarder is not None:
+        forwarder.start()
 
+    if FAST_START:
+        # 예열이 끝나기 전 요청은 백엔드가 첫 호출 때 직접 생성
+        app.state.warmup_task = asyncio.create_task(warm_backends())
+    else:
+        await warm_backends()
 
 
-def text_extract(image_content):
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in warmup_retries:
+        task.cancel()
+    await job_manager.stop()
+    if forwarder is not None:
+        await forwarder.stop()
+    for backend in ocr_backends.values():
+        backend.close()
+    preprocess_executor.shutdown(wait=False, cancel_futures=True)
+    ocr_executor.shutdown(wait=False, cancel_futures=True)
+    if cache_executor is not None:
+        # 진행 중인 저장이 끝난 뒤 닫음
+        cache_executor.shutdown(wait=True)
+    cache.close()
 
-    #os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "service-account.json"
 
-    # 이미지 전처리 (바이트에서 Pillow로 변환)
-    #pil_image = Image.open(image_content)
-    pil_image = Image.open(io.BytesIO(image_content))
-    
-    # 대비 향상 + 리사이즈
-    enhanced_img = ImageEnhance.Contrast(pil_image).enhance(2.0)
-    resized_img = enhanced_img.resize((pil_image.width * 2, pil_image.height * 2))
-    
-    # 이미지 -> 바이트로 변환 (Vision API가 읽을 수 있게게)
-    img_byte_arr = io.BytesIO()
-    resized_img.save(img_byte_arr, format='PNG')
-    content = img_byte_arr.getvalue()
-    
-    # Vision API로 OCR
-    client = vision.ImageAnnotatorClient()
-    image = vision.Image(content=content)
-    
-    response = client.text_detection(image=image)
-    texts = response.text_annotations
-    #print(texts)
+def get_backend(name=None):
+    name = name or OCR_BACKEND
+    if name not in ocr_backends:
+        raise ValueError(f"사용할 수 없는 OCR 백엔드: {name}")
+    return ocr_backends[name]
+
+
+def preprocess_params():
+    return preprocessor.config.params()
+
+
+def extract_key(image_hash, backend):
+    # 같은 이미지 + 같은 전처리 파라미터 + 같은 OCR 백엔드
+    return ocr_cache.cache_key(image_hash, {
+        **preprocess_params(), "tiers": [t.name for t in ocr_tier_list], "backend": backend.name,
+        # 저장된 좌표 기준 (upload: 업로드 원본 사진)
+        "coords": "upload",
+    })
+
+
+def observe_stages(timings):
+    for stage, ms in timings.items():
+        STAGE_SECONDS.observe(ms / 1000, stage=stage)
+
+
+def upload_coords(texts, prep):
+    # OCR 좌표(전처리 이미지 기준) -> 업로드 사진 기준 (?multi=true bbox가 원본 사진 위치와 맞도록)
+    return ocr_backend.transform_annotations(texts, prep.transform)
+
+
+def ocr_key(image_hash, tier):
+    # OCR 기록/재생(OCR_RECORD_DIR) 키: 단계마다 전처리/모델이 다르므로 단계 이름 포함
+    return f"{image_hash}.{tier.name}"
+
+
+def run_ocr(backend, content, key=None, document=False):
+    # OCR 호출 시간/실패 기록 (OCR 스레드에서 실행)
+    start = time.perf_counter()
+    try:
+        return backend.detect(content, key=key, document=document)
+    except Exception:
+        OCR_FAILURES_TOTAL.inc(backend=backend.name)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="ocr")
+
+
+def run_ocr_batch(backend, contents, keys=None, document=False):
+    start = time.perf_counter()
+    results = backend.detect_batch(contents, keys=keys, document=document)
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="ocr_batch")
+    failures = sum(isinstance(r, Exception) for r in results)
+    if failures:
+        OCR_FAILURES_TOTAL.inc(failures, backend=backend.name)
+    return results
+
+
+def run_ocr_packed(backend, contents, keys, packing, document=False, raise_transient=False):
+    """mosaic.plan 결과대로 작은 이미지는 캔버스에 모아 한 번에 OCR, 이미지별 texts 또는 예외 반환
+
+    raise_transient: 모든 이미지가 일시적 오류(UNAVAILABLE 등)로 실패하면 예외를 올림
+    (OCRDispatcher가 재시도하고, 끝내 실패하면 429/503/504로 응답)
+    """
+    singles, canvases = packing
+    start = time.perf_counter()
+    packed = [mosaic.render(canvas, contents, mosaic_config.quality) for canvas in canvases]
+    if canvases:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="mosaic")
+    detected = run_ocr_batch(backend, [contents[i] for i in singles] + packed,
+                             [keys[i] for i in singles] + [None] * len(packed), document)
+
+    results = [None] * len(contents)
+    for i, texts in zip(singles, detected):
+        results[i] = texts
+    for canvas, texts in zip(canvases, detected[len(singles):]):
+        MOSAIC_IMAGES_TOTAL.inc(len(canvas.placements))
+        if isinstance(texts, Exception):
+            for p in canvas.placements:
+                results[p.index] = texts
+        else:
+            for i, part in mosaic.split(texts, canvas).items():
+                results[i] = part
+    if raise_transient and results and all(isinstance(r, error_types()[0]) for r in results):
+        raise results[0]
+    return results
+
+
+def text_extract(image_content, backend=None, timings=None, info=None):
+    # 캐시된 OCR 결과가 있으면 사용
+    # timings에 dict를 넘기면 단계별 소요 시간(ms)을 채움, info에는 결과를 낸 OCR 단계("tier")
+    backend = get_backend(backend)
+    image_hash = ocr_cache.image_hash(image_content)
+    key = extract_key(image_hash, backend)
+    start = time.perf_counter()
+    cached = cache.get(key)
+    if timings is not None:
+        timings["cache"] = (time.perf_counter() - start) * 1000
+    if cached is not None:
+        served_by("cache", info)
+        return ocr_backend.annotations_from_json(cached)
+
+    start = time.perf_counter()
+    for n, tier in enumerate(ocr_tier_list):
+        prep = preprocess_image(image_content, tier.name)
+        observe_stages(prep.timings)
+        texts = upload_coords(run_ocr(backend, prep.content, ocr_key(image_hash, tier), tier.document), prep)
+        if n == len(ocr_tier_list) - 1 or ocr_tiers.acceptable(text_analyze(texts)):
+            break
+    if timings is not None:
+        timings.update(prep.timings)
+        timings["ocr"] = (time.perf_counter() - start) * 1000
+    served_by(tier.name, info)
+    cache.put(key, ocr_backend.annotations_to_json(texts))
+    return texts
+
+
+def served_by(tier, info=None):
+    OCR_TIER_TOTAL.inc(tier=tier)
+    if info is not None:
+        info["tier"] = tier
+
+
+async def cache_get_async(key):
+    if cache_executor is None:
+        return cache.get(key)
+    return await asyncio.get_running_loop().run_in_executor(cache_executor, cache.get, key)
+
+
+async def cache_put_async(key, texts):
+    value = ocr_backend.annotations_to_json(texts)
+    if cache_executor is None:
+        cache.put(key, value)
+    else:
+        await asyncio.get_running_loop().run_in_executor(cache_executor, cache.put, key, value)
+
+
+async def cached_texts(key, timings=None):
+    start = time.perf_counter()
+    cached = await cache_get_async(key)
+    if timings is not None:
+        timings["cache"] = (time.perf_counter() - start) * 1000
+    return None if cached is None else ocr_backend.annotations_from_json(cached)
+
+
+async def preprocess_async(image_content, timings=None, tier=None):
+    loop = asyncio.get_running_loop()
+    prep = await loop.run_in_executor(preprocess_executor, preprocess_image, image_content, tier)
+    observe_stages(prep.timings)
+    if timings is not None:
+        timings.update(prep.timings)
+    return prep
+
+
+async def ocr_async(backend, prep, image_hash, key, timings=None, image_content=None):
+    """첫 단계 전처리 결과(prep)로 OCR, 결과가 부족하면 다음 단계로 다시 전처리 + OCR
+
+    (texts, 결과를 낸 단계 이름) 반환. 다음 단계가 실패하면 이전 단계 결과 사용 (캐시에는 저장하지 않음)
+    """
+    start = time.perf_counter()
+    degraded = False
+    for n, tier in enumerate(ocr_tier_list):
+        try:
+            if n:
+                prep = await preprocess_async(image_content, tier=tier.name)
+            detected = await ocr_dispatcher.run(run_ocr, backend, prep.content, ocr_key(image_hash, tier),
+                                                tier.document)
+        except Exception as e:
+            if not n:
+                raise
+            logger.warning("OCR %s 단계 실패, %s 단계 결과 사용: %s", tier.name, served, e)
+            degraded = True
+            break
+        texts, served = upload_coords(detected, prep), tier.name
+        if n == len(ocr_tier_list) - 1 or ocr_tiers.acceptable(text_analyze(texts)):
+            break
+    if timings is not None:
+        timings["ocr"] = (time.perf_counter() - start) * 1000
+    if not degraded:
+        await cache_put_async(key, texts)
+    return texts, served
+
+
+async def text_extract_async(image_content, backend=None, timings=None, image_hash=None, info=None):
+    """text_extract와 동일, 전처리/OCR은 스레드(프로세스) 풀에서 실행"""
+    backend = get_backend(backend)
+    image_hash = image_hash or ocr_cache.image_hash(image_content)
+    key = extract_key(image_hash, backend)
+    texts = await cached_texts(key, timings)
+    if texts is not None:
+        served_by("cache", info)
+        return texts
+    prep = await preprocess_async(image_content, timings)
+    texts, tier = await ocr_async(backend, prep, image_hash, key, timings, image_content)
+    served_by(tier, info)
     return texts
 
+
+def preprocess_image(image_content, tier=None):
+    # 이미지 전처리 (크기 조정 + 대비 향상 + 인코딩), 단계별 소요 시간 포함
+    # tier: OCR 단계 이름 (기본: 첫 단계)
+    return tier_preprocessors[tier or ocr_tier_list[0].name].run(image_content)
+
+
 # def text_analyze(texts):
 #     if not texts:
 #         return None, None, None, None
@@ -127,137 +484,201 @@ def text_extract(image_content):
 #     return product_name, price, volume, brand
 
 
-def text_analyze(texts):
-    if not texts:
-        print("[디버깅] OCR 결과 없음")
-        return None, None, None, None
-        
-    full_text = texts[0].description
-    lines = [line.strip() for line in full_text.split('\n') if line.strip()]
-    #print(f"[디버깅] 전체 OCR 라인:\n{lines}\n")
+def text_analyze(texts, trace=None):
+    return text_parser.analyze(texts, trace)
 
-    product_name = None
-    price = None
-    volume = None
-    brand = None
 
-    brand_keywords = ['청정원', '오뚜기', 'CJ', '풀무원', '해표', '샘표', '롯데', '대상', '해태', '크라운', '오리온', '동원', '누아트', '농심','하림','펩시','유한']
-    volume_pattern = re.compile(r'(\d+\.?\d*)\s?(ml|g|kg|L|ℓ|G|m)', re.IGNORECASE)
-    
-    # 가격 패턴
-    main_price_patterns = [
-        re.compile(r'(\d{1,3},\d{3})'),
-        re.compile(r'(\d{1,3}\s*,\s*\d{3})'),
-    ]
-    price_patterns = [
-        re.compile(r'(\d{1,3}(,\d{3})+)\s*원?'),
-        re.compile(r'(\d+)\s*원'),
-    ]
-    
-    barcode_pattern = re.compile(r'^\d{12,14}$')
-    date_pattern = re.compile(r'\d{4}[./-]\d{2}[./-]?\d{0,2}')
-    price_candidates = []
-    candidates = []
 
-    for line in lines:
-        print(f"[디버깅] 라인 분석: {line}")
+def result(img_path, backend=None, trace=None, timings=None, multi=False, info=None):
+    texts = text_extract(img_path, backend, timings, info)
+    if multi:
+        return build_products(texts, trace, timings)
+    return build_result(texts, trace, timings)
 
-        # 바코드/날짜/이벤트 용어 제거
-        if barcode_pattern.match(line) or date_pattern.search(line):
-            print("[제외] 바코드 또는 날짜 형식 감지")
-            continue
-        if any(tag in line for tag in ['행사상품', '행사기간', '단위가격', '기준']):
-            print("[제외] 무의미한 키워드 포함")
-            continue
-        if re.search(r'^\d{2,3}\s*,?\d{3}$', line):  # 숫자만 있는 줄 (가격과 중복 가능)
+
+async def result_async(image_content, backend=None, trace=None, timings=None, info=None):
+    if trace is not None:
+        # 디버그 추적은 요청마다 따로 계산
+        texts = await text_extract_async(image_content, backend, timings, info=info)
+        return build_result(texts, trace, timings)
+
+    # 같은 이미지 + 같은 전처리/백엔드로 처리 중인 분석이 있으면 그 결과를 기다림
+    backend = get_backend(backend)
+    image_hash = ocr_cache.image_hash(image_content)
+
+    async def analyze():
+        key = extract_key(image_hash, backend)
+        texts = await cached_texts(key, timings)
+        if texts is not None:
+            return build_result(texts, None, timings), "cache"
+
+        # 전처리 중 계산한 지각 해시로 다시 찍은 같은 가격표인지 확인 (OCR 생략)
+        prep = await preprocess_async(image_content, timings)
+        found = near_duplicates.get(prep.phash, backend.name)
+        if found is not None:
+            payload, distance = found
+            logger.debug("근접 중복 이미지 결과 사용 (거리 %d)", distance)
+            return payload, "near_duplicate"
+
+        texts, tier = await ocr_async(backend, prep, image_hash, key, timings, image_content)
+        payload = build_result(texts, None, timings)
+        # 상품명을 못 찾은 결과는 저장하지 않음 (다시 찍어 올리는 경우가 대부분)
+        if payload is not None:
+            near_duplicates.add(prep.phash, payload, backend.name)
+        return payload, tier
+
+    start = time.perf_counter()
+    (payload, tier), shared = await inflight.do(extract_key(image_hash, backend), analyze)
+    if shared and timings is not None:
+        timings["coalesced"] = (time.perf_counter() - start) * 1000
+    # 공유받은 결과는 "coalesced"로 따로 집계
+    served_by("coalesced" if shared else tier, info)
+    return payload
+
+
+async def result_multi_async(image_content, backend=None, trace=None, timings=None, info=None):
+    texts = await text_extract_async(image_content, backend, timings, info=info)
+    return build_products(texts, trace, timings)
+
+
+def profiled_result(image_content, backend=None, trace=None, timings=None, multi=False, info=None):
+    """cProfile로 감싼 result (전 과정을 한 스레드에서 실행), 결과와 프로파일 파일 경로 반환"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        payload = result(image_content, backend, trace, timings, multi, info)
+    finally:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.prof")
+        profiler.dump_stats(path)
+    return payload, path
+
+
+def server_timing_header(timings):
+    return ", ".join(f"{stage};dur={ms:.2f}" for stage, ms in timings.items())
+
+
+async def result_batch_async(image_contents, backend=None):
+    """여러 이미지 분석, (항목별 payload 또는 예외, 항목별 결과를 낸 OCR 단계) 반환"""
+    loop = asyncio.get_running_loop()
+    backend = get_backend(backend)
+    image_hashes = [ocr_cache.image_hash(c) for c in image_contents]
+    keys = [extract_key(h, backend) for h in image_hashes]
+    texts_list = [None] * len(image_contents)
+    tiers = [None] * len(image_contents)
+    # 다음 단계가 실패해 이전 단계 결과를 쓴 이미지 (캐시에 저장하지 않음)
+    degraded = set()
+
+    pending = []
+    for i, key in enumerate(keys):
+        cached = await cache_get_async(key)
+        if cached is not None:
+            texts_list[i] = ocr_backend.annotations_from_json(cached)
+            tiers[i] = "cache"
+        else:
+            pending.append(i)
+
+    # 단계마다 남은 이미지만 병렬 전처리 + 최소 횟수의 batch_annotate_images 호출
+    for n, tier in enumerate(ocr_tier_list):
+        if not pending:
+            break
+        preprocessed = await asyncio.gather(
+            *[loop.run_in_executor(preprocess_executor, preprocess_image, image_contents[i], tier.name)
+              for i in pending],
+            return_exceptions=True,
+        )
+        ready = []
+        for i, prep in zip(pending, preprocessed):
+            if isinstance(prep, Exception):
+                # 이전 단계 OCR 결과가 있으면 그대로 사용 (캐시에는 저장하지 않음)
+                if texts_list[i] is None:
+                    texts_list[i] = prep
+                else:
+                    degraded.add(i)
+            else:
+                observe_stages(prep.timings)
+                ready.append((i, prep))
+        if not ready:
+            break
+
+        # 첫 단계에서는 작은 이미지를 캔버스에 모아 요청 수를 줄임 (결과가 부족하면 다음 단계에서 따로 OCR)
+        if n == 0:
+            packing = mosaic.plan([p.size for _, p in ready], mosaic_config)
+        else:
+            packing = (list(range(len(ready))), [])
+        contents = [p.content for _, p in ready]
+        hashes = [ocr_key(image_hashes[i], tier) for i, _ in ready]
+        try:
+            detected = await ocr_dispatcher.run(
+                run_ocr_packed, backend, contents, hashes, packing, tier.document, True,
+                cost=len(packing[0]) + len(packing[1]),
+            )
+        except Exception as e:
+            if not n:
+                raise
+            logger.warning("OCR %s 단계 실패, 이전 단계 결과 사용: %s", tier.name, e)
+            degraded.update(i for i, _ in ready)
+            break
+        # 일부 묶음만 일시적 오류로 실패하면 그 이미지만 다시 호출 (캔버스 없이, 끝내 실패하면 항목별 오류)
+        failed = [k for k, texts in enumerate(detected) if isinstance(texts, error_types()[0])]
+        if failed:
+            try:
+                retried = await ocr_dispatcher.run(
+                    run_ocr_packed, backend, [contents[k] for k in failed], [hashes[k] for k in failed],
+                    (list(range(len(failed))), []), tier.document, True, cost=len(failed),
+                )
+            except DispatchError:
+                retried = [detected[k] for k in failed]
+            for k, texts in zip(failed, retried):
+                detected[k] = texts
+        pending = []
+        for (i, prep), texts in zip(ready, detected):
+            if isinstance(texts, Exception):
+                if texts_list[i] is None:
+                    texts_list[i] = texts
+                else:
+                    degraded.add(i)
+                continue
+            texts = upload_coords(texts, prep)
+            texts_list[i] = texts
+            tiers[i] = tier.name
+            if n < len(ocr_tier_list) - 1 and not ocr_tiers.acceptable(text_analyze(texts)):
+                pending.append(i)
+
+    results = []
+    for i, texts in enumerate(texts_list):
+        if isinstance(texts, Exception):
+            results.append(texts)
             continue
+        if tiers[i] != "cache" and i not in degraded:
+            await cache_put_async(keys[i], texts)
+        served_by(tiers[i])
+        try:
+            results.append(build_result(texts))
+        except Exception as e:
+            results.append(e)
+    return results, tiers
 
-        # 브랜드 검출
-        if not brand:
-            for keyword in brand_keywords:
-                if keyword in line:
-                    brand = keyword
-                    print(f"[감지] 브랜드: {brand}")
-                    break
-
-        # 용량 검출
-        if not volume:
-            volume_match = volume_pattern.search(line)
-            if volume_match:
-                volume = volume_match.group()
-                print(f"[감지] 용량: {volume}")
-
-        # 가격 감지 - 높은 우선순위
-        for pattern in main_price_patterns:
-            match = pattern.search(line)
-            if match:
-                value = match.group(1).replace(" ", "")
-                price_candidates.append((value, 20))
-                print(f"[감지] 주요 가격 후보: {value}")
-                break
-
-        # 가격 감지 - 일반 우선순위
-        for pattern in price_patterns:
-            match = pattern.search(line)
-            if match:
-                value = match.group(1).replace(",", "")
-                if value.isdigit() and 500 <= int(value) <= 100000:
-                    price_candidates.append((value, 5))
-                    print(f"[감지] 일반 가격 후보: {value}")
-                break
-
-        # 상품명 후보 - 한글 포함, 너무 짧거나 숫자 위주 제외
-        if len(line) > 3 and re.search(r'[가-힣]', line) and not line.isdigit():
-            candidates.append(line)
-            print(f"[후보] 상품명 후보 추가: {line}")
-    
-    # 가격 결정
-    if price_candidates:
-        price_candidates.sort(key=lambda x: x[1], reverse=True)
-        price = price_candidates[0][0]
-        if len(price) >= 4 and ',' not in price:
-            price = price[:-3] + ',' + price[-3:]
-        price = price + "원"
-        print(f"[선택] 최종 가격: {price}")
-    
-    # # 상품명 결정
-    # if candidates:
-    #     filtered = [c for c in candidates if (brand and brand in c) or (volume and volume in c)]
-    #     product_line = max(filtered, key=len) if filtered else max(candidates, key=len)
-    #     if brand:
-    #         product_line = product_line.replace(brand, "")
-    #     if volume:
-    #         product_line = product_line.replace(volume, "")
-    #     product_name = product_line.strip("- )(")
-    #     print(f"[선택] 최종 상품명: {product_name}")
-    # 상품명 결정
-    if candidates:
-        filtered = [c for c in candidates if (brand and brand in c) or (volume and volume in c)]
-        product_line = max(filtered, key=len) if filtered else max(candidates, key=len)
-        
-        if brand:
-            product_line = product_line.replace(brand, "")
-        if volume:
-            product_line = product_line.replace(volume, "")
-        
-        # 불필요한 괄호/기호 제거
-        product_name = product_line.strip("- )(").strip()
-        
-        # brand가 괄호로 감싸진 형태로 product_name에 포함되었을 때 추가 정리
-        if product_name.startswith(")") or product_name.endswith(")"):
-            product_name = product_name.strip(")")
-        if product_name.startswith("("):
-            product_name = product_name.strip("(")
-    
-    print(f"\n[결과] 상품명: {product_name}, 가격: {price}, 용량: {volume}, 브랜드: {brand}\n")
-    return product_name, price, volume, brand
 
+async def job_result(image_content, backend=None):
+    # 작업 대기열 워커에서 실행 (/analyze/와 같은 경로: 캐시 / 동시 요청 병합 / 근접 중복)
+    info = {}
+    payload = await result_async(image_content, backend, info=info)
+    return payload, info.get("tier")
 
 
-def result(img_path):
-    texts = text_extract(img_path)
-    product_name, price, volume, brand = text_analyze(texts)
+# 비동기 분석 작업 (/jobs): 대기열 깊이가 곧 부하 신호 (JOB_WORKERS, JOB_QUEUE_SIZE, JOB_TTL)
+job_manager = JobManager.from_env(job_result)
+metrics.registry.callback("analysis_job_queue_depth", "작업 대기열에서 기다리는 이미지 수", "gauge",
+                          lambda: [({}, job_manager.depth())])
+metrics.registry.callback("analysis_jobs", "보관 중인 작업 수 (상태별)", "gauge",
+                          lambda: [({"status": k}, v) for k, v in job_manager.count().items()])
+metrics.registry.callback("analysis_jobs_total", "작업 처리 결과별 수", "counter",
+                          lambda: [({"outcome": k}, v) for k, v in job_manager.stats.items()])
 
+
+def to_payload(product_name, price, volume, brand):
     def parse_price(price_str):
         if not price_str:
             return 0
@@ -269,7 +690,7 @@ def result(img_path):
     price_num = parse_price(price)
 
     if not product_name:
-        print("no")
+        logger.debug("상품명 인식 실패")
     else: 
         payload = {
             "title": product_name or "",
@@ -277,25 +698,309 @@ def result(img_path):
             "volume": volume or "",
             "brand": brand or ""
         }
+        if catalog is not None:
+            payload["catalog"] = match_catalog(product_name, brand, volume)
         #print(payload)
         return payload  
+
+
+def match_catalog(product_name, brand, volume):
+    """OCR 상품명 -> 카탈로그 표준 상품 {"id", "name", "brand", "volume", "score"}, 없으면 None"""
+    start = time.perf_counter()
+    match = catalog.match(product_name, brand, volume)
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="catalog")
+    CATALOG_LOOKUPS_TOTAL.inc(result="hit" if match else "miss")
+    if match is None:
+        return None
+    return {**match.product._asdict(), "score": round(match.score, 3)}
+
+
+def build_result(texts, trace=None, timings=None):
+    start = time.perf_counter()
+    product_name, price, volume, brand = text_analyze(texts, trace)
+    elapsed = time.perf_counter() - start
+    STAGE_SECONDS.observe(elapsed, stage="parse")
+    if timings is not None:
+        timings["parse"] = elapsed * 1000
+    IMAGES_TOTAL.inc()
+    payload = to_payload(product_name, price, volume, brand)
+    if payload is None:
+        NO_PRODUCT_TOTAL.inc()
+    return payload
+
+
+def build_products(texts, trace=None, timings=None):
+    """진열대 사진 한 장 -> 가격표 영역별 결과 목록 (단어 바운딩 박스로 영역 분리)
+
+    bbox는 업로드한 사진(EXIF 회전 적용) 기준 픽셀 좌표 (left, top, right, bottom)
+    """
+    start = time.perf_counter()
+    regions = layout.split_regions(texts, LAYOUT_GAP_X, LAYOUT_GAP_Y)
+    elapsed = time.perf_counter() - start
+    STAGE_SECONDS.observe(elapsed, stage="layout")
+    if timings is not None:
+        timings["layout"] = elapsed * 1000
+
+    start = time.perf_counter()
+    products = []
+    for region in regions:
+        if trace is not None:
+            trace.append({"event": "region", "bbox": list(region.bbox)})
+        payload = to_payload(*text_analyze(region.texts, trace))
+        if payload is not None:
+            payload["bbox"] = list(region.bbox)
+            products.append(payload)
+    elapsed = time.perf_counter() - start
+    STAGE_SECONDS.observe(elapsed, stage="parse")
+    if timings is not None:
+        timings["parse"] = elapsed * 1000
+    IMAGES_TOTAL.inc()
+    # 이미지 단위로 집계 (상품명 없는 잡음 영역마다 세지 않음)
+    if not products:
+        NO_PRODUCT_TOTAL.inc()
+    return {"products": products}
     
+# 지표 path 라벨로 쓰는 분석 경로
+ANALYZE_PATHS = ("/analyze/", "/analyze/batch")
+
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    # 분석 요청의 처리 중 개수 / 처리 시간 / 상태 코드 기록
+    path = request.url.path
+    if not path.startswith("/analyze"):
+        return await call_next(request)
+    # 없는 경로(404)마다 지표 시계열이 생기지 않도록 한 이름으로 묶음
+    if path not in ANALYZE_PATHS:
+        path = "other"
+
+    IN_FLIGHT.inc(path=path)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        IN_FLIGHT.dec(path=path)
+        REQUEST_SECONDS.observe(time.perf_counter() - start, path=path)
+        REQUESTS_TOTAL.inc(path=path, status=status)
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # Content-Length가 제한을 넘으면 본문을 읽기 전에 거부
+    path = request.url.path
+    if path.startswith("/analyze") or path == "/jobs":
+        limit = MAX_BATCH_BYTES if path.startswith("/analyze/batch") or path == "/jobs" else MAX_UPLOAD_BYTES
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > limit:
+            UPLOADS_REJECTED_TOTAL.inc(reason="content_length")
+            return JSONResponse(status_code=413, content={"message": f"업로드 크기 제한 초과 ({limit} bytes)"})
+    return await call_next(request)
+
+def dispatch_error_response(e):
+    headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+    return JSONResponse(status_code=e.status_code, content={"message": e.message}, headers=headers)
+
+def reject_upload(e):
+    UPLOADS_REJECTED_TOTAL.inc(reason=str(e.status_code))
+    return JSONResponse(status_code=e.status_code, content={"message": e.message})
+
+async def read_uploads(files):
+    """여러 업로드 읽기 (이미지별 내용 또는 None, {인덱스: UploadRejected})
+
+    제한을 넘거나 이미지가 아닌 파일은 항목별 오류로 처리, 나머지만 분석
+    """
+    contents = [None] * len(files)
+    rejected = {}
+    total = 0
+    for i, file in enumerate(files):
+        try:
+            image_content = await read_upload(file, min(MAX_UPLOAD_BYTES, MAX_BATCH_BYTES - total))
+            probe_image(image_content, preprocessor.config.max_pixels)
+        except UploadRejected as e:
+            UPLOADS_REJECTED_TOTAL.inc(reason=str(e.status_code))
+            rejected[i] = e
+            continue
+        total += len(image_content)
+        contents[i] = image_content
+    return contents, rejected
+
+def forward_result(filename, payload, tier=None, ref=None):
+    """결과를 백엔드 전달 대기열에 넣고 scan_id 반환 (응답은 전달을 기다리지 않음)
+
+    ref: 클라이언트가 넘긴 식별 값 (사용자/세션 ID 등), 백엔드는 scan_id로 중복 제거
+    """
+    scan_id = uuid.uuid4().hex
+    forwarder.submit({"scan_id": scan_id, "timestamp": time.time(), "ref": ref,
+                      "filename": filename, "result": payload, "tier": tier})
+    return scan_id
+
+def forward_disabled():
+    return JSONResponse(status_code=400, content={"message": "결과 전달이 설정되어 있지 않습니다 (FORWARD_URL)"})
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 @app.get("/")
 async def root():
     return {"message": "상품 이미지 분석 API."}
 
+@app.get("/ready")
+async def ready():
+    """모든 OCR 백엔드 예열이 끝났으면 200, 아니면 503 (readiness probe)"""
+    is_ready = all(state == "ready" for state in backend_states.values())
+    return JSONResponse(status_code=200 if is_ready else 503,
+                        content={"ready": is_ready, "backends": backend_states})
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {**cache.get_stats(), "near_duplicate": near_duplicates.get_stats()}
+
 @app.post("/analyze/")
-async def analyze_image(file: UploadFile = File(...)):
-    image_content = await file.read()
+async def analyze_image(request: Request, response: Response, file: UploadFile = File(...),
+                        backend: Optional[str] = None, debug: bool = False,
+                        timing: bool = False, profile: bool = False, multi: bool = False,
+                        forward: bool = False, ref: Optional[str] = None):
+    try:
+        image_content = await read_upload(file, MAX_UPLOAD_BYTES)
+        probe_image(image_content, preprocessor.config.max_pixels)
+    except UploadRejected as e:
+        return reject_upload(e)
+    timing = timing or request.headers.get("X-Server-Timing") == "1"
+    profile = profile or request.headers.get("X-Profile") == "1"
+
+    if backend is not None and backend not in ocr_backends:
+        return JSONResponse(status_code=400, content={"message": f"사용할 수 없는 OCR 백엔드: {backend}"})
+    if debug and not DEBUG_TRACE_ENABLED:
+        return JSONResponse(status_code=403, content={"message": "디버그 추적이 비활성화되어 있습니다"})
+    if (timing or profile) and not PROFILING_ENABLED:
+        return JSONResponse(status_code=403, content={"message": "프로파일링이 비활성화되어 있습니다"})
+    if forward and forwarder is None:
+        return forward_disabled()
 
     try:
-        return result(image_content)
+        trace = [] if debug else None
+        timings = {} if timing else None
+        info = {}
+        start = time.perf_counter()
+        if profile:
+            loop = asyncio.get_running_loop()
+            payload, profile_path = await loop.run_in_executor(
+                ocr_executor, profiled_result, image_content, backend, trace, timings, multi, info
+            )
+            response.headers["X-Profile-File"] = os.path.basename(profile_path)
+        elif multi:
+            # 한 장에 찍힌 여러 가격표를 각각 분석
+            payload = await result_multi_async(image_content, backend, trace, timings, info)
+        else:
+            payload = await result_async(image_content, backend, trace, timings, info)
+        # 결과를 낸 OCR 단계 (fast / enhanced / document / cache / near_duplicate / coalesced)
+        if "tier" in info:
+            response.headers["X-OCR-Tier"] = info["tier"]
+        if timings is not None:
+            timings["total"] = (time.perf_counter() - start) * 1000
+            response.headers["Server-Timing"] = server_timing_header(timings)
+        # 상품을 찾은 결과만 백엔드로 전달
+        if forward and payload is not None:
+            response.headers["X-Scan-Id"] = forward_result(file.filename, payload, info.get("tier"), ref)
+
+        if debug:
+            return {"result": payload, "trace": trace}
+        return payload
     
+    except DispatchError as e:
+        return dispatch_error_response(e)
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"message": f"오류 발생: {str(e)}"}
+        )
+
+@app.post("/analyze/batch")
+async def analyze_batch(files: List[UploadFile] = File(...), backend: Optional[str] = None,
+                        forward: bool = False, ref: Optional[str] = None):
+    if backend is not None and backend not in ocr_backends:
+        return JSONResponse(status_code=400, content={"message": f"사용할 수 없는 OCR 백엔드: {backend}"})
+    if forward and forwarder is None:
+        return forward_disabled()
+
+    results = [None] * len(files)
+    tiers = [None] * len(files)
+    contents, rejected = await read_uploads(files)
+    valid = [(i, content) for i, content in enumerate(contents) if content is not None]
+    for i, e in rejected.items():
+        results[i] = e
+
+    try:
+        analyzed, served = await result_batch_async([content for _, content in valid], backend) if valid else ([], [])
+        for (i, _), res, tier in zip(valid, analyzed, served):
+            results[i] = res
+            tiers[i] = tier
+    except DispatchError as e:
+        return dispatch_error_response(e)
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"message": f"오류 발생: {str(e)}"}
         )
+
+    # 항목별 결과 (한 이미지 실패가 전체 실패로 이어지지 않음)
+    items = []
+    for file, res, tier in zip(files, results, tiers):
+        if isinstance(res, UploadRejected):
+            items.append({"filename": file.filename, "result": None, "error": res.message})
+        elif isinstance(res, Exception):
+            items.append({"filename": file.filename, "result": None, "error": f"오류 발생: {str(res)}", "tier": tier})
+        else:
+            item = {"filename": file.filename, "result": res, "error": None, "tier": tier}
+            if forward and res is not None:
+                item["scan_id"] = forward_result(file.filename, res, tier, ref)
+            items.append(item)
+    return {"results": items}
+
+@app.post("/jobs", status_code=202)
+async def submit_job(files: List[UploadFile] = File(...), backend: Optional[str] = None):
+    """분석 작업 등록 후 바로 job_id 반환 (결과는 GET /jobs/{job_id} 또는 /jobs/{job_id}/events)"""
+    if backend is not None and backend not in ocr_backends:
+        return JSONResponse(status_code=400, content={"message": f"사용할 수 없는 OCR 백엔드: {backend}"})
+
+    contents, rejected = await read_uploads(files)
+    try:
+        job = job_manager.submit([file.filename for file in files], contents, backend,
+                                 {i: e.message for i, e in rejected.items()})
+    except JobTooLarge as e:
+        return JSONResponse(status_code=413, content={"message": e.message})
+    except JobQueueFull as e:
+        return JSONResponse(status_code=503, content={"message": e.message},
+                            headers={"Retry-After": str(e.retry_after)})
+    return {"job_id": job.id, "status": job.status, "total": len(files)}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"message": "작업이 없거나 만료되었습니다"})
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events: 항목이 끝날 때마다 item, 모두 끝나면 done"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"message": "작업이 없거나 만료되었습니다"})
+
+    async def stream():
+        async for event, data in job.events():
+            # 프록시가 유휴 연결을 끊지 않도록 주석 줄 전송
+            yield ": keepalive\n\n" if event is None else sse_event(event, data)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
     
 if __name__ == "__main__":
     import uvicorn
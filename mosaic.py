@@ -0,0 +1,105 @@
+from collections import namedtuple
+from PIL import Image
+import io, os
+import layout
+
+# index: 묶음 안 이미지 순번, box: 캔버스 안 위치 (left, top, right, bottom)
+Placement = namedtuple("Placement", ["index", "box"])
+# size: 캔버스 크기 (width, height)
+Canvas = namedtuple("Canvas", ["size", "placements"])
+
+
+class MosaicConfig:
+    """작은 이미지 여러 장을 한 캔버스에 모아 OCR 한 번으로 처리 (환경 변수로 조정)"""
+
+    def __init__(self, enabled=False, max_tile=640, canvas=2048, margin=48, max_tiles=16, quality=90):
+        self.enabled = enabled
+        self.max_tile = max_tile      # 전처리 후 긴 변이 이 이하인 이미지만 묶음
+        self.canvas = canvas          # 캔버스 최대 가로/세로
+        self.margin = margin          # 이미지 사이 흰 여백 (단어가 옆 이미지와 이어지지 않도록)
+        self.max_tiles = max_tiles    # 캔버스 하나에 넣을 최대 이미지 수
+        self.quality = quality
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ.get
+        return cls(
+            enabled=env("MOSAIC_ENABLED", "0") == "1",
+            max_tile=int(env("MOSAIC_MAX_TILE", "640")),
+            canvas=int(env("MOSAIC_CANVAS", "2048")),
+            margin=int(env("MOSAIC_MARGIN", "48")),
+            max_tiles=int(env("MOSAIC_MAX_TILES", "16")),
+            quality=int(env("MOSAIC_QUALITY", "90")),
+        )
+
+
+def plan(sizes, config):
+    """이미지 크기 목록 -> (따로 OCR할 순번 목록, Canvas 목록)
+
+    높이 순으로 정렬해 줄 단위로 왼쪽부터 채움 (shelf packing). 한 장뿐인 캔버스는 따로 OCR
+    """
+    singles = []
+    tiles = []
+    for index, (width, height) in enumerate(sizes):
+        if config.enabled and max(width, height) <= config.max_tile:
+            tiles.append((index, width, height))
+        else:
+            singles.append(index)
+    tiles.sort(key=lambda t: t[2], reverse=True)
+
+    margin = config.margin
+    canvases = []
+    placements, x, y, row, width = [], margin, margin, 0, 0
+
+    def finish():
+        if len(placements) == 1:
+            singles.append(placements[0].index)
+        elif placements:
+            height = max(p.box[3] for p in placements) + margin
+            canvases.append(Canvas((width, height), list(placements)))
+
+    for index, w, h in tiles:
+        # 줄이 넘치면 다음 줄, 캔버스 아래가 넘치면(또는 최대 수) 새 캔버스
+        wrap = x > margin and x + w + margin > config.canvas
+        top = y + row + margin if wrap else y
+        if top + h + margin > config.canvas or len(placements) >= config.max_tiles:
+            finish()
+            placements, x, y, row, width = [], margin, margin, 0, 0
+        elif wrap:
+            x, y, row = margin, top, 0
+        placements.append(Placement(index, (x, y, x + w, y + h)))
+        x += w + margin
+        row = max(row, h)
+        width = max(width, x)
+    finish()
+    singles.sort()
+    return singles, canvases
+
+
+def render(canvas, contents, quality=90):
+    """Canvas 배치대로 이미지(인코딩된 바이트)를 흰 배경에 붙여 JPEG 바이트로"""
+    tiles = [Image.open(io.BytesIO(contents[p.index])) for p in canvas.placements]
+    mode = "L" if all(tile.mode == "L" for tile in tiles) else "RGB"
+    img = Image.new(mode, canvas.size, "white")
+    for tile, p in zip(tiles, canvas.placements):
+        img.paste(tile.convert(mode), p.box[:2])
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=quality)
+    return out.getvalue()
+
+
+def split(texts, canvas):
+    """캔버스 OCR 결과를 이미지별 texts로 나눔 {순번: texts}
+
+    단어 중심이 들어 있는 이미지에 배정하고 좌표는 그 이미지 기준으로 옮김
+    """
+    words = {p.index: [] for p in canvas.placements}
+    for word in layout.word_boxes(texts):
+        cx, cy = (word.left + word.right) / 2, (word.top + word.bottom) / 2
+        for p in canvas.placements:
+            left, top, right, bottom = p.box
+            if left <= cx < right and top <= cy < bottom:
+                words[p.index].append(layout.Word(word.text, word.left - left, word.top - top,
+                                                  word.right - left, word.bottom - top))
+                break
+    return {index: layout.words_to_texts(members) for index, members in words.items()}
@@ -0,0 +1,359 @@
+from collections import namedtuple
+import hashlib, io, json, os, random, time
+from vision_pool import VisionClientPool
+
+# Vision text_annotations와 같은 모양의 결과 구조
+# texts[0] = 전체 텍스트 (줄 단위 \n 구분), texts[1:] = 단어별 텍스트 + 바운딩 박스
+Vertex = namedtuple("Vertex", ["x", "y"])
+BoundingPoly = namedtuple("BoundingPoly", ["vertices"])
+TextAnnotation = namedtuple("TextAnnotation", ["description", "bounding_poly"])
+
+
+def box_annotation(description, left, top, right, bottom):
+    return TextAnnotation(description, BoundingPoly([
+        Vertex(left, top), Vertex(right, top), Vertex(right, bottom), Vertex(left, bottom),
+    ]))
+
+
+def transform_annotations(texts, transform):
+    """바운딩 박스 좌표 변환 (x * scale_x + offset_x, y * scale_y + offset_y)"""
+    scale_x, scale_y, offset_x, offset_y = transform
+    if transform == (1.0, 1.0, 0.0, 0.0):
+        return texts
+    return [
+        TextAnnotation(t.description, BoundingPoly([
+            Vertex(round(v.x * scale_x + offset_x), round(v.y * scale_y + offset_y)) for v in t.bounding_poly.vertices
+        ]))
+        for t in texts
+    ]
+
+
+def annotations_to_json(texts):
+    return json.dumps([
+        {
+            "description": t.description,
+            "vertices": [[v.x, v.y] for v in t.bounding_poly.vertices],
+        }
+        for t in texts
+    ], ensure_ascii=False)
+
+
+def annotations_from_json(data):
+    return [
+        TextAnnotation(t["description"], BoundingPoly([Vertex(x, y) for x, y in t["vertices"]]))
+        for t in json.loads(data)
+    ]
+
+
+class OCRBackend:
+    """OCR 엔진 공통 인터페이스"""
+
+    name = None
+
+    def start(self):
+        pass
+
+    def warmup(self):
+        self.start()
+
+    def close(self):
+        pass
+
+    def detect(self, content, key=None, document=False):
+        # key: 원본 업로드 이미지 해시 (기록/재생용, 일반 엔진은 무시)
+        # document: 문서(밀집 텍스트)용 모델 사용 (Vision document_text_detection, 지원하지 않는 엔진은 무시)
+        raise NotImplementedError
+
+    def detect_batch(self, contents, keys=None, document=False):
+        # 항목별 texts 또는 예외 반환
+        keys = keys or [None] * len(contents)
+        results = []
+        for content, key in zip(contents, keys):
+            try:
+                results.append(self.detect(content, key=key, document=document))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+class VisionBackend(OCRBackend):
+    """Google Vision API (text_detection / batch_annotate_images)"""
+
+    name = "vision"
+
+    def __init__(self, pool_size=2, batch_max_images=16, batch_max_bytes=8 * 1024 * 1024, timeout=20.0,
+                 credentials_info=None):
+        self.clients = VisionClientPool(pool_size, credentials_info)
+        self.timeout = timeout
+        self.batch_max_images = batch_max_images
+        self.batch_max_bytes = batch_max_bytes
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            pool_size=int(os.environ.get("VISION_CLIENT_POOL_SIZE", "2")),
+            # batch_annotate_images 한 번에 보낼 이미지 수 / 바이트 상한 (Vision API 제한)
+            batch_max_images=int(os.environ.get("VISION_BATCH_MAX_IMAGES", "16")),
+            batch_max_bytes=int(os.environ.get("VISION_BATCH_MAX_BYTES", str(8 * 1024 * 1024))),
+            # 호출당 gRPC 타임아웃 (초), 재시도는 OCRDispatcher에서 처리
+            timeout=float(os.environ.get("VISION_TIMEOUT", "20")),
+            # 서비스 계정 JSON (없으면 GOOGLE_APPLICATION_CREDENTIALS 파일 / 기본 인증 사용)
+            credentials_info=json.loads(os.environ["GOOGLE_CREDENTIALS_JSON"])
+            if os.environ.get("GOOGLE_CREDENTIALS_JSON") else None,
+        )
+
+    def start(self):
+        self.clients.start()
+
+    def warmup(self):
+        self.clients.warmup()
+
+    def close(self):
+        self.clients.close()
+
+    def detect(self, content, key=None, document=False):
+        from google.cloud import vision
+
+        client = self.clients.get()
+        image = vision.Image(content=content)
+
+        if document:
+            response = client.document_text_detection(image=image, timeout=self.timeout)
+        else:
+            response = client.text_detection(image=image, timeout=self.timeout)
+        return response.text_annotations
+
+    def split_batches(self, contents):
+        # 이미지 수 / 요청 크기 제한을 넘지 않게 인덱스 묶음으로 나눔
+        batch, batch_bytes = [], 0
+        for i, content in enumerate(contents):
+            if batch and (len(batch) >= self.batch_max_images or batch_bytes + len(content) > self.batch_max_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(i)
+            batch_bytes += len(content)
+        if batch:
+            yield batch
+
+    def detect_batch(self, contents, keys=None, document=False):
+        from google.cloud import vision
+
+        results = [None] * len(contents)
+        client = self.clients.get()
+        feature_type = vision.Feature.Type.DOCUMENT_TEXT_DETECTION if document else vision.Feature.Type.TEXT_DETECTION
+        feature = vision.Feature(type_=feature_type)
+
+        for batch in self.split_batches(contents):
+            requests = [
+                vision.AnnotateImageRequest(image=vision.Image(content=contents[i]), features=[feature])
+                for i in batch
+            ]
+            try:
+                response = client.batch_annotate_images(requests=requests, retry=None, timeout=self.timeout)
+            except Exception as e:
+                for i in batch:
+                    results[i] = e
+                continue
+
+            for i, res in zip(batch, response.responses):
+                if res.error.message:
+                    results[i] = RuntimeError(res.error.message)
+                else:
+                    results[i] = res.text_annotations
+        return results
+
+
+class TesseractBackend(OCRBackend):
+    """로컬 CPU OCR (Tesseract, 한국어 모델). pytesseract + tesseract-ocr-kor 설치 필요"""
+
+    name = "tesseract"
+
+    def __init__(self, lang="kor+eng", config=""):
+        self.lang = lang
+        self.config = config
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            lang=os.environ.get("TESSERACT_LANG", "kor+eng"),
+            config=os.environ.get("TESSERACT_CONFIG", ""),
+        )
+
+    def start(self):
+        import pytesseract
+        pytesseract.get_tesseract_version()
+
+    def detect(self, content, key=None, document=False):
+        import pytesseract
+        from PIL import Image
+
+        img = Image.open(io.BytesIO(content))
+        data = pytesseract.image_to_data(
+            img, lang=self.lang, config=self.config, output_type=pytesseract.Output.DICT
+        )
+
+        words = []
+        lines = {}
+        for i, text in enumerate(data["text"]):
+            text = text.strip()
+            if not text or float(data["conf"][i]) < 0:
+                continue
+            left, top = data["left"][i], data["top"][i]
+            right, bottom = left + data["width"][i], top + data["height"][i]
+            words.append(box_annotation(text, left, top, right, bottom))
+            line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(line_key, []).append(text)
+
+        if not words:
+            return []
+
+        full_text = "\n".join(" ".join(line) for line in lines.values()) + "\n"
+        xs = [v.x for w in words for v in w.bounding_poly.vertices]
+        ys = [v.y for w in words for v in w.bounding_poly.vertices]
+        return [box_annotation(full_text, min(xs), min(ys), max(xs), max(ys))] + words
+
+
+def record_key(content, key=None):
+    return key or hashlib.sha256(content).hexdigest()
+
+
+class RecordingBackend(OCRBackend):
+    """다른 백엔드의 응답을 이미지 해시별 JSON 파일로 기록"""
+
+    def __init__(self, backend, directory):
+        self.backend = backend
+        self.name = backend.name
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        self.backend.start()
+
+    def warmup(self):
+        self.backend.warmup()
+
+    def close(self):
+        self.backend.close()
+
+    def save(self, key, texts, elapsed_ms):
+        path = os.path.join(self.directory, f"{key}.json")
+        record = {
+            "key": key,
+            "backend": self.backend.name,
+            "elapsed_ms": elapsed_ms,
+            "texts": json.loads(annotations_to_json(texts)),
+        }
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def detect(self, content, key=None, document=False):
+        start = time.perf_counter()
+        texts = self.backend.detect(content, key=key, document=document)
+        self.save(record_key(content, key), texts, (time.perf_counter() - start) * 1000)
+        return texts
+
+    def detect_batch(self, contents, keys=None, document=False):
+        keys = keys or [None] * len(contents)
+        start = time.perf_counter()
+        results = self.backend.detect_batch(contents, keys=keys, document=document)
+        # 배치 호출은 항목별 시간을 알 수 없으므로 균등 분배
+        elapsed_ms = (time.perf_counter() - start) * 1000 / max(1, len(contents))
+        for content, key, texts in zip(contents, keys, results):
+            if not isinstance(texts, Exception):
+                self.save(record_key(content, key), texts, elapsed_ms)
+        return results
+
+
+def parse_latency(spec):
+    """지연 분포 문자열 -> (기록값 -> 지연 ms) 함수
+    none | recorded | fixed:MS | uniform:MIN:MAX | lognormal:MEDIAN:SIGMA"""
+    kind, _, args = (spec or "none").partition(":")
+    values = [float(v) for v in args.split(":") if v]
+    if kind == "none":
+        return lambda recorded: 0.0
+    if kind == "recorded":
+        return lambda recorded: recorded or 0.0
+    if kind == "fixed":
+        return lambda recorded: values[0]
+    if kind == "uniform":
+        return lambda recorded: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda recorded: median * random.lognormvariate(0.0, sigma)
+    raise ValueError(f"알 수 없는 지연 분포: {spec}")
+
+
+class ReplayBackend(OCRBackend):
+    """기록된 OCR 응답을 재생 (네트워크 없이 재현 가능한 실행용)"""
+
+    name = "replay"
+
+    def __init__(self, directory, latency="none"):
+        self.directory = directory
+        self.latency = parse_latency(latency)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            directory=os.environ.get("OCR_REPLAY_DIR", "ocr_records"),
+            latency=os.environ.get("OCR_REPLAY_LATENCY", "none"),
+        )
+
+    def detect(self, content, key=None, document=False):
+        path = os.path.join(self.directory, f"{record_key(content, key)}.json")
+        if not os.path.exists(path) and key is not None and "." in key:
+            # OCR 단계 구분 없이 기록된 이전 파일 (원본 해시만)
+            path = os.path.join(self.directory, f"{key.split('.')[0]}.json")
+        if not os.path.exists(path) and key is not None:
+            # 원본 해시 없이 기록된 경우 전처리 결과 해시로 조회
+            path = os.path.join(self.directory, f"{record_key(content)}.json")
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+
+        delay = self.latency(record.get("elapsed_ms"))
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return annotations_from_json(json.dumps(record["texts"]))
+
+
+class FakeBackend(OCRBackend):
+    """고정 텍스트를 돌려주는 가짜 OCR (부하 테스트/벤치마크용)"""
+
+    name = "fake"
+
+    def __init__(self, text="오뚜기 진라면 120g\n3,500원\n8801045570112", latency="none"):
+        self.text = text
+        self.latency = parse_latency(latency)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            text=os.environ.get("OCR_FAKE_TEXT", "오뚜기 진라면 120g\n3,500원\n8801045570112").replace("\\n", "\n"),
+            latency=os.environ.get("OCR_FAKE_LATENCY", "none"),
+        )
+
+    def detect(self, content, key=None, document=False):
+        delay = self.latency(None)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        words = []
+        for row, line in enumerate(self.text.split("\n")):
+            for col, word in enumerate(line.split()):
+                words.append(box_annotation(word, col * 100, row * 40, col * 100 + 90, row * 40 + 30))
+        return [box_annotation(self.text + "\n", 0, 0, 1000, 1000)] + words
+
+
+BACKENDS = {
+    VisionBackend.name: VisionBackend,
+    TesseractBackend.name: TesseractBackend,
+    ReplayBackend.name: ReplayBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def create_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 OCR 백엔드: {name}")
+    return BACKENDS[name].from_env()
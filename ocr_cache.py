@@ -0,0 +1,126 @@
+import hashlib, json, os, sqlite3, threading, time
+from collections import OrderedDict
+
+
+def image_hash(image_content):
+    return hashlib.sha256(image_content).hexdigest()
+
+
+def cache_key(image_hash, params):
+    """업로드 이미지 해시 + 전처리 파라미터로 캐시 키 생성"""
+    h = hashlib.sha256(image_hash.encode("ascii"))
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+class OCRCache:
+    """OCR 결과 캐시 (메모리 LRU + 선택적 SQLite 디스크 계층)"""
+
+    def __init__(self, max_entries=256, ttl=86400, db_path=None, db_max_entries=10000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_max_entries = db_max_entries
+        self.db_path = db_path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS ocr_cache_accessed ON ocr_cache (accessed)")
+            self._db.commit()
+
+    def _expired(self, created, now):
+        return self.ttl and now - created > self.ttl
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM ocr_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self._expired(created, now):
+                        self._db.execute("UPDATE ocr_cache SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._put_memory(key, created, value)
+                        self.stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM ocr_cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, now, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ocr_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _put_memory(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self, now):
+        # TTL 만료 항목 삭제 후, 개수 초과분은 오래 안 쓰인 순서로 삭제
+        if self.ttl:
+            self._db.execute("DELETE FROM ocr_cache WHERE created < ?", (now - self.ttl,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()
+        if count > self.db_max_entries:
+            self._db.execute(
+                "DELETE FROM ocr_cache WHERE key IN "
+                "(SELECT key FROM ocr_cache ORDER BY accessed ASC LIMIT ?)",
+                (count - self.db_max_entries,),
+            )
+            self.stats["evictions"] += count - self.db_max_entries
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            if self._db is not None:
+                (stats["disk_entries"],) = self._db.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hit_rate"] = hits / total if total else 0.0
+        return stats
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def from_env():
+    return OCRCache(
+        max_entries=int(os.environ.get("OCR_CACHE_SIZE", "256")),
+        ttl=float(os.environ.get("OCR_CACHE_TTL", "86400")),
+        db_path=os.environ.get("OCR_CACHE_DB") or None,
+        db_max_entries=int(os.environ.get("OCR_CACHE_DB_MAX_ENTRIES", "10000")),
+    )
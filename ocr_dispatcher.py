@@ -0,0 +1,176 @@
+import asyncio, os, random, sys, threading, time
+
+_error_types = None
+
+
+def error_types():
+    """(재시도할 일시적 오류, 할당량 초과, 타임아웃) 예외 타입
+
+    gRPC UNAVAILABLE / DEADLINE_EXCEEDED / RESOURCE_EXHAUSTED 등 google.api_core 예외는
+    Vision 백엔드가 불러온 뒤에만 포함 (시작 시 google.api_core를 불러오지 않도록)
+    """
+    global _error_types
+    if _error_types is not None:
+        return _error_types
+    transient, quota, timeout = (TimeoutError, ConnectionError), (), (TimeoutError,)
+    api_exceptions = sys.modules.get("google.api_core.exceptions")
+    if api_exceptions is None:
+        return transient, quota, timeout
+    _error_types = (
+        transient + (
+            api_exceptions.ServiceUnavailable,
+            api_exceptions.DeadlineExceeded,
+            api_exceptions.TooManyRequests,  # ResourceExhausted 포함
+            api_exceptions.InternalServerError,
+            api_exceptions.Aborted,
+        ),
+        quota + (api_exceptions.TooManyRequests,),
+        timeout + (api_exceptions.DeadlineExceeded,),
+    )
+    return _error_types
+
+
+class DispatchError(Exception):
+    """OCR 호출 거부/실패 (status_code: 응답 상태 코드, retry_after: 초)"""
+
+    def __init__(self, status_code, message, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.retry_after = retry_after
+
+
+def error_status(exc):
+    # 재시도 후에도 남은 일시적 오류 -> 응답 상태 코드
+    _, quota, timeout = error_types()
+    if isinstance(exc, quota):
+        return 429
+    if isinstance(exc, timeout):
+        return 504
+    return 503
+
+
+class TokenBucket:
+    """초당 rate개, 최대 burst개까지 쌓이는 토큰 (rate <= 0 이면 제한 없음)"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, cost=1, max_wait=None):
+        """토큰을 예약하고 기다려야 할 시간(초) 반환, max_wait 안에 못 받으면 None"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = max(0.0, (cost - self.tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= cost
+            return wait
+
+
+class OCRDispatcher:
+    """OCR 호출 동시 실행 수 / 초당 호출 수 / 대기열 / 마감 시간 / 재시도 관리
+
+    동시 실행이 가득 차고 대기열도 가득 차면 즉시 503,
+    마감 시간 안에 할당량 토큰을 받을 수 없으면 429,
+    마감 시간 초과 시 504
+    """
+
+    def __init__(self, executor, max_concurrency=16, max_queue=64, rate=0, burst=10,
+                 timeout=30.0, retries=3, backoff_base=0.2, backoff_max=5.0):
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.bucket = TokenBucket(rate, burst)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.stats = {"calls": 0, "retries": 0, "rejected_queue": 0, "rejected_rate": 0,
+                      "deadline_exceeded": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls, executor, default_concurrency=16):
+        return cls(
+            executor,
+            max_concurrency=int(os.environ.get("OCR_MAX_CONCURRENCY", str(default_concurrency))),
+            max_queue=int(os.environ.get("OCR_MAX_QUEUE", "64")),
+            # Vision 할당량에 맞춘 초당 요청 수 (0: 제한 없음)
+            rate=float(os.environ.get("OCR_RATE_LIMIT", "0")),
+            burst=int(os.environ.get("OCR_RATE_BURST", "10")),
+            timeout=float(os.environ.get("OCR_DEADLINE", "30")),
+            retries=int(os.environ.get("OCR_RETRIES", "3")),
+            backoff_base=float(os.environ.get("OCR_BACKOFF_BASE", "0.2")),
+            backoff_max=float(os.environ.get("OCR_BACKOFF_MAX", "5")),
+        )
+
+    def backoff(self, attempt):
+        # full jitter 지수 백오프
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get_stats(self):
+        return {**self.stats, "active": self.active, "waiting": self.waiting}
+
+    async def run(self, fn, *args, cost=1, timeout=None):
+        """fn(*args)를 OCR 스레드 풀에서 실행, cost: 소모할 할당량 (이미지 수)"""
+        deadline = time.monotonic() + (timeout or self.timeout)
+
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.stats["rejected_queue"] += 1
+            raise DispatchError(503, "OCR 대기열이 가득 찼습니다", retry_after=1)
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            self.stats["deadline_exceeded"] += 1
+            raise DispatchError(504, "OCR 대기 시간 초과")
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            return await self._call(fn, args, cost, deadline)
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    async def _call(self, fn, args, cost, deadline):
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            wait = self.bucket.reserve(cost, max_wait=remaining)
+            if wait is None:
+                self.stats["rejected_rate"] += 1
+                raise DispatchError(429, "OCR 요청 한도 초과", retry_after=max(1, round(cost / self.bucket.rate)))
+            if wait:
+                await asyncio.sleep(wait)
+
+            self.stats["calls"] += 1
+            try:
+                # 마감 시간이 지나면 결과를 기다리지 않음 (스레드의 호출은 백엔드 자체 타임아웃으로 종료)
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self.executor, fn, *args), deadline - time.monotonic()
+                )
+            except error_types()[0] as e:
+                if time.monotonic() >= deadline:
+                    self.stats["deadline_exceeded"] += 1
+                    raise DispatchError(504, "OCR 응답 시간 초과") from e
+                delay = self.backoff(attempt)
+                if attempt >= self.retries or time.monotonic() + delay >= deadline:
+                    self.stats["failures"] += 1
+                    raise DispatchError(error_status(e), f"OCR 일시적 오류: {e}") from e
+                attempt += 1
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
@@ -0,0 +1,31 @@
+from collections import namedtuple
+import os, re
+
+# name: 단계 이름, overrides: 기본 전처리 설정에서 바꿀 값, document: document_text_detection 사용
+Tier = namedtuple("Tier", ["name", "overrides", "document"])
+
+TIERS = {
+    # 원본 해상도(확대 없음), 대비 조정 없음, 가벼운 JPEG
+    "fast": Tier("fast", {"max_upscale": 1.0, "contrast": 1.0, "quality": 75}, False),
+    # 기존 처리 (대비 + 확대), 영역 자르기 없이 전체 이미지
+    "enhanced": Tier("enhanced", {"crop": False}, False),
+    # 전체 이미지 + 문서용 OCR 모델
+    "document": Tier("document", {"crop": False}, True),
+}
+
+HANGUL_PATTERN = re.compile(r"[가-힣]")
+
+
+def from_env():
+    """OCR_TIERS: 시도할 단계 순서 (기본 fast,enhanced,document / enhanced = 단계 없이 한 번)"""
+    names = [name.strip() for name in os.environ.get("OCR_TIERS", "fast,enhanced,document").split(",") if name.strip()]
+    for name in names:
+        if name not in TIERS:
+            raise ValueError(f"알 수 없는 OCR 단계: {name}")
+    return [TIERS[name] for name in names]
+
+
+def acceptable(parsed, min_title=2):
+    """text_analyze 결과가 충분한지 (상품명과 가격이 있고 상품명에 한글이 min_title자 이상)"""
+    product_name, price, volume, brand = parsed
+    return bool(product_name) and bool(price) and len(HANGUL_PATTERN.findall(product_name)) >= min_title
@@ -0,0 +1,113 @@
+import itertools, os, threading
+from collections import OrderedDict
+from preprocess import HASH_SIZE
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def flip_masks(width, radius):
+    """width비트 안에서 radius개 이하 비트를 뒤집는 마스크 목록"""
+    masks = []
+    for r in range(radius + 1):
+        for bits in itertools.combinations(range(width), r):
+            mask = 0
+            for bit in bits:
+                mask |= 1 << bit
+            masks.append(mask)
+    return masks
+
+
+class NearDuplicateIndex:
+    """지각 해시 근접 검색 (multi-index hashing + LRU)
+
+    해시를 m 조각으로 나누면, 거리가 d 이하인 두 해시는 적어도 한 조각의 거리가
+    d // m 이하 (비둘기집 원리). 조각별 해시 테이블에서 그 반경 안의 값만 찾아
+    후보를 모은 뒤 전체 거리로 확인하므로 저장된 항목 수와 무관하게 조회 비용이 거의 일정
+    """
+
+    def __init__(self, max_entries=2048, max_distance=40, bits=HASH_SIZE * HASH_SIZE, chunk_bits=16):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        n = max(1, bits // chunk_bits)
+        bounds = [bits * i // n for i in range(n + 1)]
+        # 조각 (시작 비트, 마스크)
+        self._chunks = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(bounds, bounds[1:])]
+        radius = max_distance // n
+        self._flips = {hi - lo: flip_masks(hi - lo, radius) for lo, hi in zip(bounds, bounds[1:])}
+        self._tables = {}              # namespace -> 조각별 {조각 값: 항목 키 집합}
+        self._entries = OrderedDict()  # (namespace, hash) -> payload
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.environ.get("PHASH_INDEX_SIZE", "2048")),
+            # 256비트 dHash 기준 허용 해밍 거리 (클수록 적중률 증가, 다른 가격표 오인 위험 증가)
+            max_distance=int(os.environ.get("PHASH_MAX_DISTANCE", "40")),
+        )
+
+    def _parts(self, value):
+        return [(value >> lo) & mask for lo, mask in self._chunks]
+
+    def get(self, value, namespace=None):
+        """가장 가까운 (payload, 거리), 없으면 None"""
+        if not self.max_entries or value is None:
+            return None
+        with self._lock:
+            candidates = set()
+            tables = self._tables.get(namespace)
+            if tables:
+                for table, part, (lo, mask) in zip(tables, self._parts(value), self._chunks):
+                    for flip in self._flips[mask.bit_length()]:
+                        keys = table.get(part ^ flip)
+                        if keys:
+                            candidates.update(keys)
+
+            best = None
+            for key in candidates:
+                distance = hamming(key[1], value)
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (key, distance)
+
+            if best is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best[0])
+            self.stats["hits"] += 1
+            return self._entries[best[0]], best[1]
+
+    def add(self, value, payload, namespace=None):
+        if not self.max_entries or value is None:
+            return
+        key = (namespace, value)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._entries[key] = payload
+                return
+            self._entries[key] = payload
+            tables = self._tables.setdefault(namespace, [{} for _ in self._chunks])
+            for table, part in zip(tables, self._parts(value)):
+                table.setdefault(part, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                old, _ = self._entries.popitem(last=False)
+                tables = self._tables[old[0]]
+                for table, part in zip(tables, self._parts(old[1])):
+                    bucket = table[part]
+                    bucket.discard(old)
+                    if not bucket:
+                        del table[part]
+                self.stats["evictions"] += 1
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,224 @@
+from PIL import Image, ImageEnhance, ImageOps
+import io, os, sys, time
+import tag_detect
+
+
+class PreprocessConfig:
+    """OCR 전처리 설정 (환경 변수로 조정)
+
+    기본값은 기존 처리와 같은 이미지(컬러, 대비 2배, 2배 확대, PNG)를 Vision에 보냄.
+    긴 변 기준 리사이즈 / 흑백 / JPEG / 가격표 영역 자르기는 image/ 샘플로 Vision 정확도를
+    비교하기 전까지 선택 사항 (PREPROCESS_BOUNDED, PREPROCESS_GRAYSCALE, PREPROCESS_FORMAT, PREPROCESS_CROP)
+    """
+
+    def __init__(self, min_side=1600, max_side=3000, max_upscale=2.0, contrast=2.0,
+                 grayscale=False, format="PNG", quality=90, draft=True, max_pixels=40_000_000,
+                 crop=False, crop_max_area=0.6, bounded=False):
+        self.bounded = bounded            # 긴 변 기준 확대/축소 (False: 크기와 관계없이 max_upscale배)
+        self.min_side = min_side          # 긴 변이 이보다 작으면 확대
+        self.max_side = max_side          # 긴 변이 이보다 크면 축소
+        self.max_upscale = max_upscale    # 최대 확대 배율
+        self.contrast = contrast
+        self.grayscale = grayscale
+        self.format = format.upper()      # JPEG | WEBP | PNG
+        self.quality = quality
+        self.draft = draft                # JPEG 축소 디코딩 사용 여부
+        self.max_pixels = max_pixels      # 디코딩 후 허용 최대 픽셀 수 (0 = 제한 없음)
+        self.crop = crop                  # 가격표 후보 영역만 잘라서 OCR
+        self.crop_max_area = crop_max_area  # 후보 영역이 이 비율보다 크면 자르지 않음
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ.get
+        return cls(
+            bounded=env("PREPROCESS_BOUNDED", "0") == "1",
+            min_side=int(env("PREPROCESS_MIN_SIDE", "1600")),
+            max_side=int(env("PREPROCESS_MAX_SIDE", "3000")),
+            max_upscale=float(env("PREPROCESS_MAX_UPSCALE", "2.0")),
+            contrast=float(env("PREPROCESS_CONTRAST", "2.0")),
+            grayscale=env("PREPROCESS_GRAYSCALE", "0") == "1",
+            format=env("PREPROCESS_FORMAT", "PNG"),
+            quality=int(env("PREPROCESS_QUALITY", "90")),
+            draft=env("PREPROCESS_DRAFT", "1") == "1",
+            max_pixels=int(env("MAX_IMAGE_PIXELS", "40000000")),
+            crop=env("PREPROCESS_CROP", "0") == "1",
+            crop_max_area=float(env("PREPROCESS_CROP_MAX_AREA", "0.6")),
+        )
+
+    def params(self):
+        # 캐시 키에 들어가는 값
+        return dict(vars(self))
+
+    def replace(self, **overrides):
+        """일부 값만 바꾼 사본"""
+        return PreprocessConfig(**{**self.params(), **overrides})
+
+
+class PreprocessResult:
+    def __init__(self, content, size, timings, cpu_timings, phash=None, transform=(1.0, 1.0, 0.0, 0.0)):
+        self.content = content            # OCR 백엔드로 보낼 인코딩된 바이트
+        self.size = size                  # 최종 (width, height)
+        self.timings = timings            # 단계별 소요 시간 (ms)
+        self.cpu_timings = cpu_timings    # 단계별 CPU 시간 (ms, 실행 스레드 기준)
+        self.phash = phash                # 지각 해시 (dHash, HASH_SIZE * HASH_SIZE 비트 정수)
+        # 최종 이미지 좌표 -> 업로드 원본(EXIF 회전 적용) 좌표: (scale_x, scale_y, offset_x, offset_y)
+        # 원본 x = x * scale_x + offset_x (축소 디코딩 / 자르기 / 리사이즈를 되돌림)
+        self.transform = transform
+
+
+# dHash 한 변 크기 (16 -> 256비트, 8x8보다 가격표 글자 배치 차이를 더 잘 구분)
+HASH_SIZE = 16
+
+
+def dhash(img, size=HASH_SIZE):
+    """이웃 픽셀 밝기 비교 해시 (다시 찍은 사진끼리는 해밍 거리가 작음)"""
+    small = img.resize((size + 1, size), Image.Resampling.BOX)
+    if small.mode != "L":
+        small = small.convert("L")
+    pixels = small.tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+# 축소 디코딩(draft)이 가능한 형식: 1/2, 1/4, 1/8 단위
+DRAFT_FORMATS = ("JPEG", "MPO")
+
+
+def required_reduction(format, width, height, max_pixels):
+    """픽셀 예산을 지키기 위한 축소 디코딩 배율 (1 = 불필요, None = 예산 내 디코딩 불가)"""
+    if not max_pixels or width * height <= max_pixels:
+        return 1
+    if format not in DRAFT_FORMATS:
+        return None
+    factor = 2
+    while width * height / (factor * factor) > max_pixels:
+        if factor == 8:
+            return None
+        factor *= 2
+    return factor
+
+
+def target_scale(width, height, config):
+    if not config.bounded:
+        return config.max_upscale
+    long_side = max(width, height)
+    if long_side > config.max_side:
+        return config.max_side / long_side
+    if long_side < config.min_side:
+        return min(config.min_side / long_side, config.max_upscale)
+    return 1.0
+
+
+class Preprocessor:
+    """디코딩 → EXIF 회전 → 흑백 → 가격표 영역 자르기 → 대비/리사이즈 → 인코딩"""
+
+    def __init__(self, config=None):
+        self.config = config or PreprocessConfig()
+
+    def run(self, image_content):
+        config = self.config
+        timings, cpu_timings = {}, {}
+        t, cpu = time.perf_counter(), time.thread_time()
+
+        def lap(name):
+            nonlocal t, cpu
+            now, now_cpu = time.perf_counter(), time.thread_time()
+            timings[name] = (now - t) * 1000
+            cpu_timings[name] = (now_cpu - cpu) * 1000
+            t, cpu = now, now_cpu
+
+        img = Image.open(io.BytesIO(image_content))
+        source_size = img.size
+        # 헤더만 읽은 상태에서 픽셀 예산 확인 (전체 디코딩 전)
+        factor = required_reduction(img.format, img.width, img.height, config.max_pixels)
+        if factor is None:
+            raise ValueError(f"이미지 픽셀 수가 허용 범위를 넘습니다 ({img.width}x{img.height})")
+
+        # EXIF 회전 전 기준 크기로 목표 배율 계산 (회전해도 긴 변은 동일)
+        scale = target_scale(img.width, img.height, config)
+        draft_scale = scale if config.draft else 1.0
+        if factor > 1:
+            draft_scale = min(draft_scale, 1 / factor)
+        if img.format in DRAFT_FORMATS and draft_scale <= 0.5:
+            # JPEG는 1/2, 1/4, 1/8 단위로 축소 디코딩 가능
+            mode = "L" if config.grayscale else "RGB"
+            img.draft(mode, (max(1, int(img.width * draft_scale)), max(1, int(img.height * draft_scale))))
+        img.load()
+        lap("decode")
+
+        decoded_size = img.size
+        ImageOps.exif_transpose(img, in_place=True)
+        if img.size != decoded_size:
+            # 90도 회전 (EXIF orientation 5~8)
+            source_size = source_size[::-1]
+        # 축소 디코딩 배율
+        ratio_x, ratio_y = source_size[0] / img.width, source_size[1] / img.height
+        lap("orient")
+
+        if config.grayscale:
+            if img.mode != "L":
+                img = img.convert("L")
+        elif img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        lap("convert")
+
+        # 축소 사본에서 글자가 몰린 영역을 찾아 그 부분만 사용 (확대/인코딩/전송량 감소)
+        box = None
+        if config.crop:
+            box = tag_detect.crop_box(img, config.crop_max_area)
+            if box is not None:
+                img = img.crop(box)
+            lap("detect")
+        offset = (box[0] * ratio_x, box[1] * ratio_y) if box is not None else (0.0, 0.0)
+        cropped_size = img.size
+
+        # 축소 디코딩(또는 자른) 결과 크기를 기준으로 다시 배율 계산
+        scale = target_scale(img.width, img.height, config)
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+
+        # 대비 조정은 두 크기 중 작은 쪽에서 수행
+        enhance = config.contrast != 1.0
+        if scale < 1.0:
+            img = img.resize(size, Image.Resampling.BICUBIC, reducing_gap=3.0)
+            lap("resize")
+            if enhance:
+                img = ImageEnhance.Contrast(img).enhance(config.contrast)
+            lap("enhance")
+        else:
+            if enhance:
+                img = ImageEnhance.Contrast(img).enhance(config.contrast)
+            lap("enhance")
+            if scale != 1.0:
+                img = img.resize(size, Image.Resampling.BICUBIC)
+            lap("resize")
+
+        # 최종 크기에서 계산 (원본보다 작아 빠름)
+        phash = dhash(img)
+        lap("phash")
+
+        out = io.BytesIO()
+        if config.format == "PNG":
+            img.save(out, format="PNG", compress_level=1)
+        elif config.format == "WEBP":
+            img.save(out, format="WEBP", quality=config.quality, method=2)
+        else:
+            img.save(out, format="JPEG", quality=config.quality)
+        lap("encode")
+
+        transform = (cropped_size[0] / img.width * ratio_x, cropped_size[1] / img.height * ratio_y, *offset)
+        return PreprocessResult(out.getvalue(), img.size, timings, cpu_timings, phash, transform)
+
+
+if __name__ == "__main__":
+    # 사용법: python preprocess.py image/*.jpg
+    preprocessor = Preprocessor(PreprocessConfig.from_env())
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            data = f.read()
+        res = preprocessor.run(data)
+        steps = ", ".join(f"{k} {v:.1f}ms" for k, v in res.timings.items())
+        print(f"{path}: {len(data)} -> {len(res.content)} bytes, {res.size[0]}x{res.size[1]} ({steps})")
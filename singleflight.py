@@ -0,0 +1,33 @@
+import asyncio
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 작업을 한 번만 실행하고 결과를 공유 (이벤트 루프 안에서만 사용)"""
+
+    def __init__(self):
+        self._calls = {}
+        self.stats = {"leaders": 0, "shared": 0}
+
+    def _forget(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # 기다리던 요청이 모두 취소된 경우에도 예외 미확인 경고가 나지 않도록
+        if not future.cancelled():
+            future.exception()
+
+    async def do(self, key, fn):
+        """(결과, 공유 여부) 반환, fn: 코루틴을 돌려주는 함수"""
+        future = self._calls.get(key)
+        if future is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(future), True
+
+        # 별도 태스크로 실행 (먼저 온 요청이 취소돼도 나머지는 결과를 받음)
+        future = asyncio.ensure_future(fn())
+        self._calls[key] = future
+        future.add_done_callback(lambda f: self._forget(key, f))
+        self.stats["leaders"] += 1
+        return await asyncio.shield(future), False
+
+    def in_flight(self):
+        return len(self._calls)
@@ -0,0 +1,125 @@
+from PIL import Image, ImageChops, ImageFilter
+from collections import deque
+
+
+# 가로/세로 방향 밝기 변화 (Sobel). 음수는 잘리므로 부호를 바꾼 커널과 합침
+SOBEL_X = (-1, 0, 1, -2, 0, 2, -1, 0, 1)
+SOBEL_Y = (-1, -2, -1, 0, 0, 0, 1, 2, 1)
+
+
+def gradient(img, kernel):
+    forward = img.filter(ImageFilter.Kernel((3, 3), kernel, scale=4))
+    backward = img.filter(ImageFilter.Kernel((3, 3), [-k for k in kernel], scale=4))
+    return ImageChops.add(forward, backward)
+
+
+def edge_density(img, size=256, cell=4):
+    """축소 사본의 글자 에지 세기를 cell x cell 칸 평균으로 (격자 이미지)
+
+    글자는 가로/세로 에지가 모두 있고 바코드는 한 방향뿐이므로 두 방향 중 약한 쪽을 사용.
+    축소본이 3픽셀보다 좁으면(테두리를 빼면 남는 칸이 없음) None
+    """
+    factor = max(img.width, img.height) // size
+    small = img.reduce(factor) if factor > 1 else img.copy()
+    small.thumbnail((size, size), Image.Resampling.BILINEAR)
+    if small.width < 3 or small.height < 3:
+        return None
+    if small.mode != "L":
+        small = small.convert("L")
+    # 필터가 만드는 테두리 1픽셀 에지는 제외
+    inner = (1, 1, small.width - 1, small.height - 1)
+    grid = (max(1, small.width // cell), max(1, small.height // cell))
+    gx = gradient(small, SOBEL_X).crop(inner).resize(grid, Image.Resampling.BOX)
+    gy = gradient(small, SOBEL_Y).crop(inner).resize(grid, Image.Resampling.BOX)
+    return ImageChops.darker(gx, gy)
+
+
+def components(mask, weights, width, height):
+    """8-연결 요소별 (격자 bbox (left, top, right, bottom), 가중치 합)"""
+    seen = bytearray(width * height)
+    found = []
+    for start in range(width * height):
+        if not mask[start] or seen[start]:
+            continue
+        seen[start] = 1
+        queue = deque([start])
+        left, top, right, bottom, score = width, height, 0, 0, 0
+        while queue:
+            i = queue.popleft()
+            x, y = i % width, i // width
+            left, top, right, bottom = min(left, x), min(top, y), max(right, x + 1), max(bottom, y + 1)
+            score += weights[i]
+            for ny in (y - 1, y, y + 1):
+                if 0 <= ny < height:
+                    for nx in (x - 1, x, x + 1):
+                        if 0 <= nx < width:
+                            j = ny * width + nx
+                            if mask[j] and not seen[j]:
+                                seen[j] = 1
+                                queue.append(j)
+        found.append(((left, top, right, bottom), score))
+    return found
+
+
+def detect_regions(img, size=256, cell=4, min_area=0.005, margin=0.02, padding=0.05):
+    """글자가 몰린(에지 밀도가 높은) 가격표 후보 영역 목록
+
+    원본 대비 비율 (left, top, right, bottom)과 점수(에지 세기 합), 점수 높은 순
+    """
+    density = edge_density(img, size, cell)
+    if density is None:
+        return []
+    width, height = density.size
+    values = density.tobytes()
+    mean = sum(values) / len(values)
+    std = (sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5
+    # 이중 임계값: 약한 칸까지 이어서 영역을 넓히되, 강한 칸이 있는 영역만 후보
+    # (축소본에서는 가는 획이나 줄 끝 글자의 에지가 약함)
+    strong_threshold = max(mean + std, 24)
+    weak_threshold = max(mean + std / 4, 8)
+    strong = bytes(v if v >= strong_threshold else 0 for v in values)
+    weak = bytes(255 if v >= weak_threshold else 0 for v in values)
+    # 이웃 칸까지 넓혀(팽창) 글자 사이 빈칸을 메움
+    mask = Image.frombytes("L", (width, height), weak).filter(ImageFilter.MaxFilter(3)).tobytes()
+
+    regions = []
+    for (left, top, right, bottom), score in components(mask, strong, width, height):
+        if not score or (right - left) * (bottom - top) < min_area * width * height:
+            continue
+        # 축소본에서는 글자 끝부분 에지가 약하므로 영역 크기에 비례한 여백도 추가
+        pad_x = margin + padding * (right - left) / width
+        pad_y = margin + padding * (bottom - top) / height
+        regions.append(((
+            max(0.0, left / width - pad_x), max(0.0, top / height - pad_y),
+            min(1.0, right / width + pad_x), min(1.0, bottom / height + pad_y),
+        ), score))
+    regions.sort(key=lambda r: r[1], reverse=True)
+    return regions
+
+
+def area(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+def union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def crop_box(img, max_area=0.6, min_score=0.3, **kwargs):
+    """글자가 많은 영역들을 모두 포함하는 자를 상자 (픽셀)
+
+    가장 강한 영역 점수의 min_score 이상인 영역을 모두 포함해야 하며,
+    그 상자가 max_area 비율보다 크거나(자를 이득 없음) 후보가 없으면 None
+    """
+    regions = detect_regions(img, **kwargs)
+    if not regions:
+        return None
+    box, best = regions[0]
+    for other, score in regions[1:]:
+        if score >= best * min_score:
+            box = union(box, other)
+    if area(box) > max_area:
+        return None
+    return (int(box[0] * img.width), int(box[1] * img.height),
+            max(int(box[0] * img.width) + 1, round(box[2] * img.width)),
+            max(int(box[1] * img.height) + 1, round(box[3] * img.height)))
@@ -0,0 +1,225 @@
+import logging, os, re
+
+logger = logging.getLogger("analysis.parser")
+
+BRAND_DICT_PATH = os.environ.get(
+    "BRAND_DICT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "brands.txt")
+)
+
+# 무의미한 행사/단위가격 키워드 (포함된 줄은 제외)
+EXCLUDE_TAGS = ['행사상품', '행사기간', '단위가격', '기준']
+
+HANGUL_PATTERN = re.compile(r'[가-힣]')
+DIGIT_PATTERN = re.compile(r'\d')
+BARCODE_OR_DATE_PATTERN = re.compile(r'^\d{12,14}$|\d{4}[./-]\d{2}[./-]?\d{0,2}')
+NUMBER_ONLY_PATTERN = re.compile(r'^\d{2,3}\s*,?\d{3}$')  # 숫자만 있는 줄 (가격과 중복 가능)
+VOLUME_PATTERN = re.compile(r'(\d+\.?\d*)\s?(ml|g|kg|L|ℓ|G|m)', re.IGNORECASE)
+
+# 가격 패턴
+MAIN_PRICE_PATTERNS = [
+    re.compile(r'(\d{1,3},\d{3})'),
+    re.compile(r'(\d{1,3}\s*,\s*\d{3})'),
+]
+COMMA_PRICE_PATTERN = re.compile(r'(\d{1,3}(,\d{3})+)\s*원?')
+WON_PRICE_PATTERN = re.compile(r'(\d+)\s*원')
+
+
+def load_brands(path=BRAND_DICT_PATH):
+    # 한 줄에 브랜드 하나, # 뒤는 주석. 파일 순서가 우선순위
+    with open(path, encoding="utf-8") as f:
+        brands = [line.split("#", 1)[0].strip() for line in f]
+    return [brand for brand in brands if brand]
+
+
+class KeywordMatcher:
+    """Aho-Corasick 다중 키워드 검색 (키워드 수와 무관하게 줄 길이에 비례)"""
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        goto = [{}]
+        outputs = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            outputs[state].append(index)
+
+        # BFS로 실패 링크 계산, 출력은 실패 링크 쪽 출력까지 합침
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, child in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0) if goto[f].get(ch) != child else 0
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(o) for o in outputs]
+        self._delta = {}  # (상태, 문자) -> 다음 상태 (지연 계산되는 DFA 전이)
+
+    def _next(self, state, ch):
+        goto, fail = self._goto, self._fail
+        s = state
+        while s and ch not in goto[s]:
+            s = fail[s]
+        nxt = goto[s].get(ch, 0)
+        self._delta[(state, ch)] = nxt
+        return nxt
+
+    def find(self, text):
+        """text에 포함된 키워드 인덱스 집합"""
+        delta, outputs = self._delta, self._outputs
+        state = 0
+        found = set()
+        for ch in text:
+            nxt = delta.get((state, ch))
+            state = self._next(state, ch) if nxt is None else nxt
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+class TextParser:
+    """OCR 텍스트 -> (상품명, 가격, 용량, 브랜드). 패턴/사전은 생성 시 한 번만 컴파일"""
+
+    def __init__(self, brands=None, exclude_tags=EXCLUDE_TAGS):
+        self.brands = list(brands) if brands is not None else load_brands()
+        # 브랜드와 제외 키워드를 한 오토마톤으로 한 번에 검색
+        self.matcher = KeywordMatcher(self.brands + list(exclude_tags))
+        self.n_brands = len(self.brands)
+
+    def _note(self, trace, event, **fields):
+        # 디버그 로그 / 요청별 추적 기록 (debug 모드일 때만 호출)
+        if trace is not None:
+            trace.append({"event": event, **fields})
+        logger.debug("%s %s", event, fields, extra={"event": event, "fields": fields})
+
+    def analyze(self, texts, trace=None):
+        """trace에 리스트를 넘기면 줄 단위 판단 과정을 기록"""
+        # 진단 비활성 시 포맷팅 비용 없이 진행
+        debug = trace is not None or logger.isEnabledFor(logging.DEBUG)
+        note = self._note
+
+        if not texts:
+            if debug:
+                note(trace, "empty")
+            return None, None, None, None
+
+        full_text = texts[0].description
+        lines = [line.strip() for line in full_text.split('\n') if line.strip()]
+
+        product_name = None
+        price = None
+        volume = None
+        brand = None
+        n_brands = self.n_brands
+        price_candidates = []
+        candidates = []
+
+        for line in lines:
+            if debug:
+                note(trace, "line", line=line)
+
+            has_digit = DIGIT_PATTERN.search(line) is not None
+            keywords = self.matcher.find(line)
+
+            # 바코드/날짜/이벤트 용어 제거
+            if has_digit and BARCODE_OR_DATE_PATTERN.search(line):
+                if debug:
+                    note(trace, "exclude", reason="barcode_or_date")
+                continue
+            if keywords and max(keywords) >= n_brands:
+                if debug:
+                    note(trace, "exclude", reason="tag")
+                continue
+            if has_digit and NUMBER_ONLY_PATTERN.search(line):
+                if debug:
+                    note(trace, "exclude", reason="number_only")
+                continue
+
+            # 브랜드 검출 (사전 순서상 가장 앞선 브랜드)
+            if not brand and keywords:
+                brand = self.brands[min(keywords)]
+                if debug:
+                    note(trace, "brand", value=brand)
+
+            if has_digit:
+                # 용량 검출
+                if not volume:
+                    volume_match = VOLUME_PATTERN.search(line)
+                    if volume_match:
+                        volume = volume_match.group()
+                        if debug:
+                            note(trace, "volume", value=volume)
+
+                has_comma = ',' in line
+                has_won = '원' in line
+
+                # 가격 감지 - 높은 우선순위 (쉼표 필요)
+                if has_comma:
+                    for pattern in MAIN_PRICE_PATTERNS:
+                        match = pattern.search(line)
+                        if match:
+                            value = match.group(1).replace(" ", "")
+                            price_candidates.append((value, 20))
+                            if debug:
+                                note(trace, "price_candidate", value=value, priority=20)
+                            break
+
+                # 가격 감지 - 일반 우선순위 (쉼표 또는 '원' 필요)
+                match = COMMA_PRICE_PATTERN.search(line) if has_comma else None
+                if match is None and has_won:
+                    match = WON_PRICE_PATTERN.search(line)
+                if match:
+                    value = match.group(1).replace(",", "")
+                    if value.isdigit() and 500 <= int(value) <= 100000:
+                        price_candidates.append((value, 5))
+                        if debug:
+                            note(trace, "price_candidate", value=value, priority=5)
+
+            # 상품명 후보 - 한글 포함, 너무 짧거나 숫자 위주 제외
+            if len(line) > 3 and HANGUL_PATTERN.search(line) and not line.isdigit():
+                candidates.append(line)
+                if debug:
+                    note(trace, "name_candidate", value=line)
+
+        # 가격 결정
+        if price_candidates:
+            price_candidates.sort(key=lambda x: x[1], reverse=True)
+            price = price_candidates[0][0]
+            if len(price) >= 4 and ',' not in price:
+                price = price[:-3] + ',' + price[-3:]
+            price = price + "원"
+            if debug:
+                note(trace, "price", value=price)
+
+        # 상품명 결정
+        if candidates:
+            filtered = [c for c in candidates if (brand and brand in c) or (volume and volume in c)]
+            product_line = max(filtered, key=len) if filtered else max(candidates, key=len)
+
+            if brand:
+                product_line = product_line.replace(brand, "")
+            if volume:
+                product_line = product_line.replace(volume, "")
+
+            # 불필요한 괄호/기호 제거
+            product_name = product_line.strip("- )(").strip()
+
+            # brand가 괄호로 감싸진 형태로 product_name에 포함되었을 때 추가 정리
+            if product_name.startswith(")") or product_name.endswith(")"):
+                product_name = product_name.strip(")")
+            if product_name.startswith("("):
+                product_name = product_name.strip("(")
+
+        if debug:
+            note(trace, "result", title=product_name, price=price, volume=volume, brand=brand)
+        return product_name, price, volume, brand
@@ -0,0 +1,48 @@
+from PIL import Image
+import io
+from preprocess import required_reduction
+
+ALLOWED_FORMATS = {"JPEG", "MPO", "PNG", "WEBP", "GIF", "BMP", "TIFF"}
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+async def read_upload(file, max_bytes, chunk_size=256 * 1024):
+    """업로드를 조각 단위로 읽으며 크기 제한 확인 (초과 시 나머지는 읽지 않음)"""
+    if file.size is not None and file.size > max_bytes:
+        raise UploadRejected(413, f"업로드 크기 제한 초과 ({max_bytes} bytes)")
+
+    chunks = []
+    total = 0
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadRejected(413, f"업로드 크기 제한 초과 ({max_bytes} bytes)")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def probe_image(image_content, max_pixels):
+    """헤더만 읽어 형식/크기 확인 (픽셀 디코딩 없음)"""
+    try:
+        with Image.open(io.BytesIO(image_content)) as img:
+            format, width, height = img.format, img.width, img.height
+    except Image.DecompressionBombError:
+        raise UploadRejected(413, "이미지 픽셀 수가 허용 범위를 넘습니다")
+    except Exception:
+        raise UploadRejected(415, "이미지 파일을 인식할 수 없습니다")
+
+    if format not in ALLOWED_FORMATS:
+        raise UploadRejected(415, f"지원하지 않는 이미지 형식: {format}")
+    # JPEG는 축소 디코딩으로 예산 안에 들어오면 허용
+    if required_reduction(format, width, height, max_pixels) is None:
+        raise UploadRejected(413, f"이미지 픽셀 수가 허용 범위를 넘습니다 ({width}x{height})")
+    return format, width, height
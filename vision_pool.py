@@ -0,0 +1,52 @@
+import itertools, threading
+
+
+class VisionClientPool:
+    """프로세스 공용 Vision 클라이언트 풀 (라운드 로빈, 스레드 안전)
+
+    google.cloud.vision / grpc는 무거우므로 클라이언트를 처음 만들 때 불러옴
+    """
+
+    def __init__(self, size=2, credentials_info=None):
+        self.size = max(1, size)
+        # 서비스 계정 JSON dict (파일로 쓰지 않고 메모리에서 인증 정보 생성)
+        self.credentials_info = credentials_info
+        self._clients = []
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def credentials(self):
+        if self.credentials_info is None:
+            return None
+        from google.oauth2 import service_account
+        return service_account.Credentials.from_service_account_info(
+            self.credentials_info, scopes=["https://www.googleapis.com/auth/cloud-platform"]
+        )
+
+    def start(self):
+        with self._lock:
+            if not self._clients:
+                from google.cloud import vision
+                credentials = self.credentials()
+                self._clients = [vision.ImageAnnotatorClient(credentials=credentials) for _ in range(self.size)]
+
+    def get(self):
+        # startup 훅을 거치지 않은 경우(스크립트 실행 등)에도 동작하도록 지연 생성
+        if not self._clients:
+            self.start()
+        clients = self._clients
+        return clients[next(self._counter) % len(clients)]
+
+    def warmup(self, timeout=10.0):
+        # gRPC 채널 연결(TCP + TLS + HTTP/2)을 미리 맺어 첫 요청의 연결 비용 제거
+        import grpc
+
+        self.start()
+        for client in self._clients:
+            grpc.channel_ready_future(client.transport.grpc_channel).result(timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.transport.close()